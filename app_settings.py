@@ -0,0 +1,188 @@
+"""
+Accelerator, thread and batch size settings for the docling pipeline.
+
+Values come from DEFAULT_SETTINGS, overridden by the JSON settings file (PDF2JSON_SETTINGS,
+default settings.json) and then by environment variables (see ENV_VARS).
+"""
+import json
+import logging
+import os
+import platform
+import time
+from pathlib import Path
+
+from docling.datamodel.pipeline_options import AcceleratorDevice, AcceleratorOptions
+from docling.datamodel.settings import settings as docling_settings
+from PIL import Image, ImageDraw
+
+from converter import ConverterRegistry, default_pipeline_options, profile_options
+
+_log = logging.getLogger(__name__)
+
+SETTINGS_FILE = Path(os.environ.get("PDF2JSON_SETTINGS", "settings.json"))
+DEVICES = [device.value for device in AcceleratorDevice]
+DEFAULT_SETTINGS = {
+    'device': AcceleratorDevice.AUTO.value,
+    'num_threads': 4,               # torch / OCR threads (docling's own default)
+    'page_batch_size': 2,           # pages per convert() call in the app (time to first element)
+    'docling_page_batch_size': 4,   # pages docling pushes through its models at once
+    'auto_tune': False,             # benchmark the candidates at startup when not tuned for this host yet
+    'tuned_for': None,
+    'profile_pipeline': True,       # docling per-stage timings (OCR, layout, tables...) for the profiler panel
+    'formula_crops': True,          # crop unreadable formulas from the page render as image elements
+    'export_jsonl': True,           # append confirmed questions to scratch/export/questions.jsonl
+    'export_elements': False,       # stream every converted element too (PNG-encodes every image, opt-in)
+}
+ENV_VARS = {
+    'device': "PDF2JSON_DEVICE",
+    'num_threads': "PDF2JSON_NUM_THREADS",
+    'page_batch_size': "PDF2JSON_PAGE_BATCH_SIZE",
+    'docling_page_batch_size': "PDF2JSON_DOCLING_PAGE_BATCH_SIZE",
+    'auto_tune': "PDF2JSON_AUTO_TUNE",
+    'profile_pipeline': "PDF2JSON_PROFILE_PIPELINE",
+    'formula_crops': "PDF2JSON_FORMULA_CROPS",
+    'export_jsonl': "PDF2JSON_EXPORT_JSONL",
+    'export_elements': "PDF2JSON_EXPORT_ELEMENTS",
+}
+SAMPLE_PDF = Path("scratch") / "autotune-sample.pdf"
+
+
+def env_settings():
+    """Settings given by environment variables; invalid values are logged and ignored."""
+    settings = {}
+    for key, env_var in ENV_VARS.items():
+        value = os.environ.get(env_var)
+        if value is None:
+            continue
+        if isinstance(DEFAULT_SETTINGS[key], bool):
+            settings[key] = value.lower() in ("1", "true", "yes")
+        elif key == 'device':
+            if value.lower() not in DEVICES:
+                _log.warning(f"Ignoring {env_var}={value!r}, expected one of {DEVICES}")
+                continue
+            settings[key] = value.lower()
+        else:
+            try:
+                settings[key] = int(value)
+            except ValueError:
+                _log.warning(f"Ignoring {env_var}={value!r}, expected a number")
+    return settings
+
+
+def read_settings_file(settings_file=SETTINGS_FILE):
+    if not Path(settings_file).exists():
+        return {}
+    try:
+        return json.loads(Path(settings_file).read_text(encoding="utf-8"))
+    except ValueError as e:
+        _log.warning(f"Ignoring invalid settings file {settings_file}: {e}")
+        return {}
+
+
+def load_settings(settings_file=SETTINGS_FILE):
+    settings = dict(DEFAULT_SETTINGS)
+    settings.update(read_settings_file(settings_file))
+    if settings['device'] not in DEVICES:
+        _log.warning(f"Unknown accelerator device {settings['device']!r} in {settings_file}, expected one of {DEVICES}")
+        settings['device'] = DEFAULT_SETTINGS['device']
+    settings.update(env_settings())
+    return settings
+
+
+def save_settings(settings, settings_file=SETTINGS_FILE):
+    """
+    Write settings, except values that only came from the environment: those keep what the file
+    had (a one-off PDF2JSON_NUM_THREADS=8 run doesn't change the saved settings). A value changed
+    away from its environment override is saved.
+    """
+    saved = read_settings_file(settings_file)
+    env = env_settings()
+    for key, value in settings.items():
+        if key in env and value == env[key]:
+            continue
+        saved[key] = value
+    Path(settings_file).write_text(json.dumps(saved, indent=2), encoding="utf-8")
+
+
+def apply_settings(settings, pipeline_options=None):
+    """Pipeline options (default_pipeline_options unless given) using the configured device and threads."""
+    pipeline_options = pipeline_options or default_pipeline_options()
+    pipeline_options.accelerator_options = AcceleratorOptions(
+        num_threads=settings['num_threads'], device=AcceleratorDevice(settings['device']))
+    # process wide docling setting
+    docling_settings.perf.page_batch_size = settings['docling_page_batch_size']
+    docling_settings.debug.profile_pipeline_timings = settings['profile_pipeline']
+    return pipeline_options
+
+
+def host_id():
+    return f"{platform.node()}/{platform.machine()}/{os.cpu_count()}"
+
+
+def needs_autotune(settings):
+    return settings['auto_tune'] and settings.get('tuned_for') != host_id()
+
+
+def make_sample_pdf(path=SAMPLE_PDF):
+    """A one page exam-like PDF (text lines and a ruled table) drawn with PIL, used to benchmark settings."""
+    if path.exists():
+        return path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    page = Image.new("RGB", (1240, 1754), "white")  # A4 at 150 dpi
+    draw = ImageDraw.Draw(page)
+    y = 80
+    for n in range(1, 9):
+        draw.text((80, y), f"QUESTAO {n}. Sample question text used to benchmark the conversion pipeline.", fill="black")
+        for letter in "ABCDE":
+            y += 28
+            draw.text((110, y), f"{letter}) alternative {letter.lower()}", fill="black")
+        y += 50
+    for row in range(6):
+        for col in range(4):
+            x0, y0 = 80 + col * 270, y + row * 40
+            draw.rectangle((x0, y0, x0 + 270, y0 + 40), outline="black")
+            draw.text((x0 + 10, y0 + 12), f"cell {row}.{col}", fill="black")
+    page.save(path, "PDF", resolution=150.0)
+    return path
+
+
+def candidate_settings(settings):
+    cores = os.cpu_count() or 1
+    threads = sorted({t for t in (4, cores // 4, cores // 2, cores) if t >= 1})
+    devices = [AcceleratorDevice.CPU.value]
+    try:
+        import torch
+        if torch.cuda.is_available():
+            devices.append(AcceleratorDevice.CUDA.value)
+        if torch.backends.mps.is_available():
+            devices.append(AcceleratorDevice.MPS.value)
+    except ImportError:
+        pass
+    return [dict(settings, device=device, num_threads=num_threads) for device in devices for num_threads in threads]
+
+
+def autotune(settings, sample_pdf=None):
+    """
+    Convert a sample page with every candidate device / thread count (full profile, the OCR one is
+    the slowest) and return the settings of the fastest, marked as tuned for this host.
+    """
+    sample_pdf = sample_pdf or make_sample_pdf()
+    best, best_seconds = None, None
+    for candidate in candidate_settings(settings):
+        converters = ConverterRegistry()
+        try:
+            converter = converters.get(profile_options("full", apply_settings(candidate)))
+            converter.convert(sample_pdf)  # first run pays lazy initializations
+            start_time = time.time()
+            converter.convert(sample_pdf)
+            seconds = time.time() - start_time
+        except Exception as e:
+            _log.warning(f"Auto-tune candidate {candidate['device']}/{candidate['num_threads']} failed: {e}")
+            continue
+        _log.info(f"Auto-tune {candidate['device']} with {candidate['num_threads']} threads: {seconds:.2f}s/page")
+        if best_seconds is None or seconds < best_seconds:
+            best, best_seconds = candidate, seconds
+    if best is None:
+        return settings
+    _log.info(f"Auto-tune picked {best['device']} with {best['num_threads']} threads")
+    return dict(best, tuned_for=host_id())
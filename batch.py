@@ -0,0 +1,170 @@
+"""
+Headless batch conversion:
+    python batch.py INPUT_DIR OUTPUT_DIR [--workers N] [--format jsonl|json|export] [--profile auto|full|...] [--pages 1-3,7]
+
+Every PDF under INPUT_DIR is converted in a process pool (one warm converter per worker process)
+and its elements are written to OUTPUT_DIR/<name>.jsonl (or .json), one element record per line
+in the same shape the app builds for the left panel, images base64 encoded. <name> is the PDF's
+path relative to INPUT_DIR without the suffix, so 2020/prova.pdf and 2021/prova.pdf don't collide.
+--format export streams them to OUTPUT_DIR/<name>/elements.jsonl instead, images as
+OUTPUT_DIR/images/<sha256>.png (see export.py); an interrupted run picks up where it stopped.
+"""
+import argparse
+import json
+import logging
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from app_settings import ENV_VARS, apply_settings, load_settings
+from converter import (PIPELINE_PROFILES, ConverterRegistry, count_pages, output_options_key, page_runs,
+                       parse_pages, resolve_profile)
+from export import DocumentExporter
+from extraction import encode_image, extract_element
+
+_log = logging.getLogger(__name__)
+
+# set in every worker process by init_worker
+_converters = None
+_pipeline_options = None
+
+
+def init_worker(settings):
+    """Load the models once per worker process."""
+    global _converters, _pipeline_options
+    logging.basicConfig(level=logging.INFO)
+    _pipeline_options = apply_settings(settings)
+    _converters = ConverterRegistry()
+    _converters.get(_pipeline_options)
+
+
+def document_records(document, counters=None, encode_images=True):
+    """
+    Element records of a converted document, numbered like the app numbers them, images base64
+    encoded under 'value' (left as PIL images under 'image' with encode_images=False).
+    """
+    counters = Counter() if counters is None else counters
+    for element, _level in document.iterate_items():
+        try:
+            record = extract_element(element, document)
+        except Exception as e:
+            _log.warning(f"Error processing element {type(element).__name__}: {str(e)}")
+            continue
+        if record is None:
+            continue
+        if 'image' in record:
+            counters[record['kind']] += 1
+            record['number'] = counters[record['kind']]
+            if encode_images:
+                record['value'] = encode_image(record.pop('image'))
+        yield record
+
+
+def write_records(records, output_file, output_format):
+    count = 0
+    tmp_file = output_file.with_suffix(output_file.suffix + ".tmp")
+    with tmp_file.open("w", encoding="utf-8") as fp:
+        if output_format == "json":
+            fp.write("[")
+        for record in records:
+            if output_format == "json":
+                fp.write(",\n" if count else "\n")
+            fp.write(json.dumps(record, ensure_ascii=False))
+            if output_format == "jsonl":
+                fp.write("\n")
+            count += 1
+        if output_format == "json":
+            fp.write("\n]\n")
+    os.replace(tmp_file, output_file)
+    return count
+
+
+def convert_file(file_path, output_dir, output_format, profile, page_selection="", name=None):
+    """
+    Runs in a worker process. name is the output path relative to output_dir without the suffix
+    (the file's stem by default). Returns (name, profile, pages, elements, seconds, error).
+    """
+    name = name or Path(file_path).stem
+    start_time = time.time()
+    try:
+        pages = parse_pages(page_selection, count_pages(file_path))
+        profile, pipeline_options = resolve_profile(file_path, profile, _pipeline_options, pages)
+        converter = _converters.get(pipeline_options)
+
+        if output_format == "export":
+            exporter = DocumentExporter(output_dir, name, source=output_options_key(pipeline_options))
+            elements = 0
+            try:
+                counters = Counter()
+                for first_page, last_page in page_runs(pages):
+                    conv_res = converter.convert(file_path, page_range=(first_page, last_page))
+                    elements += exporter.export_records(
+                        document_records(conv_res.document, counters, encode_images=False), first_page)
+            finally:
+                exporter.close()
+            return name, profile, len(pages), elements, time.time() - start_time, None
+
+        def records():
+            # one docling call per contiguous run of selected pages, numbering continues across runs
+            counters = Counter()
+            for first_page, last_page in page_runs(pages):
+                conv_res = converter.convert(file_path, page_range=(first_page, last_page))
+                yield from document_records(conv_res.document, counters)
+
+        output_file = Path(output_dir) / f"{name}.{output_format}"
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        elements = write_records(records(), output_file, output_format)
+        return name, profile, len(pages), elements, time.time() - start_time, None
+    except Exception as e:
+        return name, profile, 0, 0, time.time() - start_time, str(e)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a directory of PDFs to JSON without the GUI.")
+    parser.add_argument("input_dir", type=Path)
+    parser.add_argument("output_dir", type=Path)
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 1) // 4),
+                        help="worker processes, each loads its own models (default: cores / 4)")
+    parser.add_argument("--format", choices=["jsonl", "json", "export"], default="jsonl")
+    parser.add_argument("--profile", choices=PIPELINE_PROFILES, default="auto",
+                        help="pipeline profile, auto pre-scans every PDF (default: auto)")
+    parser.add_argument("--pages", default="",
+                        help='pages to convert in every PDF, e.g. "1-3, 7" (default: all)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    files = sorted(args.input_dir.rglob("*.pdf"))
+    if not files:
+        print(f"No PDF files found in {args.input_dir}")
+        return
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+    settings = load_settings()
+    if not os.environ.get(ENV_VARS['num_threads']):
+        # split the cores between the workers instead of every worker using all of them
+        settings['num_threads'] = max(1, (os.cpu_count() or 1) // args.workers)
+
+    start_time = time.time()
+    total_pages = 0
+    converted = 0
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker, initargs=(settings,)) as pool:
+        # the output mirrors the input tree, same-named PDFs in different folders don't overwrite each other
+        futures = [pool.submit(convert_file, str(f), str(args.output_dir), args.format, args.profile, args.pages,
+                               f.relative_to(args.input_dir).with_suffix("").as_posix()) for f in files]
+        for future in as_completed(futures):
+            name, profile, pages, elements, seconds, error = future.result()
+            if error:
+                print(f"FAILED {name}: {error}")
+                continue
+            converted += 1
+            total_pages += pages
+            print(f"{name}: {pages} pages, {elements} elements in {seconds:.2f}s ({profile})")
+
+    elapsed = time.time() - start_time
+    print(f"Converted {converted}/{len(files)} documents, {total_pages} pages in {elapsed:.2f}s "
+          f"({total_pages / elapsed:.2f} pages/s, {converted / elapsed:.2f} docs/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""
+Benchmark of the conversion and UI-population hot paths:
+    python bench.py [--pdf FILE ...] [--pages N] [--profile auto|full|...] [--output FILE] [--baseline FILE]
+
+Synthetic exam PDFs (text, a ruled table and a picture per page, drawn with PIL) are generated
+under scratch/bench; --pdf adds real samples. Qt runs offscreen. Results go to a JSON file with
+per-stage timings, pages/s and peak RSS. With --baseline the run fails (exit code 1) when pages/s
+or memory per page regress by more than --tolerance.
+"""
+import argparse
+import base64
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from importlib.metadata import version
+from pathlib import Path
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PIL import Image, ImageDraw
+from PySide6.QtWidgets import QApplication
+
+from app_settings import apply_settings, load_settings
+from converter import PIPELINE_PROFILES, ConverterRegistry, count_pages, resolve_profile
+from extraction import encode_png
+from image_store import pixmap_from_raw
+from main import PDFtoJSONApp
+from profiler import Profiler, peak_rss_bytes
+from submission import inline_images, snapshot
+from worker import ConversionWorker
+
+BENCH_DIR = Path("scratch") / "bench"
+
+def make_synthetic_pdf(path, pages):
+    """Exam-like PDF with a text block, a ruled table and a picture on every page."""
+    if path.exists():
+        return path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    images = []
+    for page_no in range(1, pages + 1):
+        page = Image.new("RGB", (1240, 1754), "white")  # A4 at 150 dpi
+        draw = ImageDraw.Draw(page)
+        y = 80
+        for n in range(3):
+            question = (page_no - 1) * 3 + n + 1
+            draw.text((80, y), f"QUESTAO {question}. Enunciado da questao numero {question} do exame.", fill="black")
+            for letter in "ABCDE":
+                y += 26
+                draw.text((110, y), f"{letter}) alternativa {letter.lower()} da questao {question}", fill="black")
+            y += 60
+        for row in range(5):
+            for col in range(4):
+                x0, y0 = 80 + col * 270, y + row * 36
+                draw.rectangle((x0, y0, x0 + 270, y0 + 36), outline="black")
+                draw.text((x0 + 10, y0 + 10), f"{row * col + page_no}", fill="black")
+        y += 5 * 36 + 60
+        # a "picture": filled shapes with a gradient background
+        for i in range(300):
+            draw.line((300, y + i, 900, y + i), fill=(200 - i // 2, 120, 60 + i // 2))
+        draw.ellipse((450, y + 50, 750, y + 250), fill=(30, 90, 180), outline="black")
+        images.append(page)
+    images[0].save(path, "PDF", resolution=150.0, save_all=True, append_images=images[1:])
+    return path
+
+
+def bench_document(pdf_path, profile, base_options, converters, window, timings):
+    profile, pipeline_options = resolve_profile(str(pdf_path), profile, base_options)
+    with timings.span("converter_init"):
+        converter = converters.get(pipeline_options)
+    pages = count_pages(str(pdf_path))
+
+    start_time = time.perf_counter()
+    with timings.span("convert"):
+        conv_res = converter.convert(str(pdf_path))
+    convert_seconds = time.perf_counter() - start_time
+
+    # same code path as the app: worker extraction, then the window's process_* methods
+    window.clear_layout()
+    worker = ConversionWorker(converters, base_options, str(pdf_path), window.image_spill)
+    with timings.span("extract_records"):
+        raw_records = worker.extract_records(conv_res.document)
+
+    processors = {'text': window.process_text, 'table': window.process_table, 'picture': window.process_picture}
+    images = {}
+    for raw in raw_records:
+        image = raw.get('image')
+        if image is not None:
+            with timings.span("png_encode"):
+                png = encode_png(image)
+            with timings.span("base64_encode"):
+                base64.b64encode(png)
+            with timings.span("pixmap_full"):
+                pixmap_from_raw(image.mode, image.size, image.tobytes())
+        with timings.span("thumbnail_and_spill"):
+            record = worker.build_record(raw, 1)
+        with timings.span(f"process_{record['kind']}"):
+            record = processors[record['kind']](record)
+        window.element_model.append_records([record])
+        if image is not None:
+            with timings.span("pixmap_thumbnail"):
+                window.load_element_pixmap(record, 400)
+            images[record['key']] = png
+
+    # confirm_inputs payload with every element of the document selected
+    question_data = {'data': [], 'filter': {'materia': ['Quimica'], 'assunto': [''], 'subAssunto': [''],
+                                            'faculdade': '', 'ano': ''}}
+    blobs = {}
+    for n, record in enumerate(window.element_model.records):
+        if record['kind'] == 'text':
+            question_data['data'].append({'id': n, 'value': record['text'], 'type': 'question'})
+        else:
+            png = images[record['key']]
+            digest = f"{n:064x}"
+            blobs[digest] = png
+            question_data['data'].append({'id': n, 'sha256': digest, 'type': 'image'})
+    with timings.span("confirm_serialize_hash"):
+        body = json.dumps(snapshot(question_data), ensure_ascii=False).encode("utf-8")
+    hash_body_bytes = len(body)
+    with timings.span("confirm_serialize_json"):
+        body = json.dumps(inline_images(snapshot(question_data), blobs.__getitem__), ensure_ascii=False).encode("utf-8")
+    json_body_bytes = len(body)
+
+    return {
+        'file': str(pdf_path),
+        'profile': profile,
+        'pages': pages,
+        'elements': len(raw_records),
+        'convert_s': convert_seconds,
+        'pages_per_s': pages / convert_seconds if convert_seconds else None,
+        'payload_bytes_json': json_body_bytes,
+        'payload_bytes_hash': hash_body_bytes,
+        'peak_rss_bytes': peak_rss_bytes(),
+    }
+
+
+def run(pdf_paths, profile):
+    app = QApplication.instance() or QApplication([])
+    settings = load_settings()
+    base_options = apply_settings(settings)
+    timings = Profiler()
+    converters = ConverterRegistry()
+    # a throwaway question store: the window restores and saves drafts
+    store_dir = tempfile.TemporaryDirectory(prefix="pdf-to-json-bench-")
+    window = PDFtoJSONApp(background_tasks=False, store_path=Path(store_dir.name) / "questions.db")
+
+    start_rss = peak_rss_bytes()
+    documents = [bench_document(path, profile, base_options, converters, window, timings) for path in pdf_paths]
+    window.close()
+    app.processEvents()
+    store_dir.cleanup()
+
+    total_pages = sum(d['pages'] for d in documents)
+    total_convert = sum(d['convert_s'] for d in documents)
+    peak_rss = peak_rss_bytes()
+    return {
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'docling': version("docling"),
+            'settings': settings,
+        },
+        'documents': documents,
+        'stages': timings.stage_summary(),
+        'totals': {
+            'pages': total_pages,
+            'pages_per_s': total_pages / total_convert if total_convert else None,
+            'peak_rss_bytes': peak_rss,
+            'rss_per_page_bytes': (peak_rss - start_rss) / total_pages if peak_rss and total_pages else None,
+        },
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Regression messages of results against a previous results file."""
+    regressions = []
+    current, previous = results['totals'], baseline['totals']
+    if current['pages_per_s'] and previous.get('pages_per_s'):
+        if current['pages_per_s'] < previous['pages_per_s'] * (1 - tolerance):
+            regressions.append(f"pages/s {current['pages_per_s']:.2f} < baseline {previous['pages_per_s']:.2f}")
+    if current['rss_per_page_bytes'] and previous.get('rss_per_page_bytes'):
+        if current['rss_per_page_bytes'] > previous['rss_per_page_bytes'] * (1 + tolerance):
+            regressions.append(f"memory/page {current['rss_per_page_bytes'] / 1048576:.1f} MB > baseline "
+                               f"{previous['rss_per_page_bytes'] / 1048576:.1f} MB")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark conversion and UI population.")
+    parser.add_argument("--pdf", type=Path, action="append", default=[], help="extra sample PDF (repeatable)")
+    parser.add_argument("--pages", type=int, default=10, help="pages of the synthetic PDF (default: 10)")
+    parser.add_argument("--profile", choices=PIPELINE_PROFILES, default="auto")
+    parser.add_argument("--output", type=Path, default=None,
+                        help="results file (default: scratch/bench/results-<timestamp>.json)")
+    parser.add_argument("--baseline", type=Path, default=None, help="results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed regression (default: 0.10)")
+    args = parser.parse_args()
+
+    pdf_paths = [make_synthetic_pdf(BENCH_DIR / f"synthetic-{args.pages}p.pdf", args.pages)] + args.pdf
+    results = run(pdf_paths, args.profile)
+
+    output = args.output or BENCH_DIR / f"results-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    totals = results['totals']
+    print(f"{totals['pages']} pages at {totals['pages_per_s']:.2f} pages/s, "
+          f"peak RSS {(totals['peak_rss_bytes'] or 0) / 1048576:.0f} MB -> {output}")
+
+    if args.baseline:
+        regressions = compare(results, json.loads(args.baseline.read_text(encoding="utf-8")), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
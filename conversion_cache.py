@@ -0,0 +1,115 @@
+"""
+On-disk cache of converted page batches, keyed by the PDF bytes, the pipeline options, the page range,
+the docling version and the record shape (extraction.RECORD_VERSION).
+
+Each entry is a directory with the docling document (document.json, images as placeholders),
+the extracted element records (elements.json) and their images stored raw under images/.
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import uuid
+from importlib.metadata import version
+from pathlib import Path
+
+from docling_core.types.doc import ImageRefMode
+from PIL import Image
+
+from converter import output_options_key
+from extraction import RECORD_VERSION
+
+_log = logging.getLogger(__name__)
+
+CACHE_DIR = Path("scratch") / "cache"
+CACHE_MAX_MB = int(os.environ.get("PDF2JSON_CACHE_MB", "2048"))
+
+
+def file_hash(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as fp:
+        for block in iter(lambda: fp.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def dir_size(path):
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+
+class ConversionCache:
+    def __init__(self, root=CACHE_DIR, max_mb=CACHE_MAX_MB):
+        self.root = Path(root)
+        self.max_bytes = max_mb * 1024 * 1024
+
+    def key(self, file_digest, pipeline_options, first_page, last_page):
+        # the docling version is part of the key, an upgrade may change the output, and so is the
+        # record version, entries without fields added since would load incomplete records;
+        # device / threads are not, a batch run or auto-tune hits what the app converted
+        parts = [file_digest, output_options_key(pipeline_options), f"{first_page}-{last_page}", version("docling"),
+                 f"records-{RECORD_VERSION}"]
+        return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+    def load(self, key):
+        """Element records of a cached batch (images loaded back as PIL images), or None."""
+        entry = self.root / key
+        elements_file = entry / "elements.json"
+        if not elements_file.exists():
+            return None
+        try:
+            records = json.loads(elements_file.read_text(encoding="utf-8"))
+            for record in records:
+                image_file = record.pop('image_file', None)
+                if image_file is not None:
+                    data = (entry / image_file['path']).read_bytes()
+                    record['image'] = Image.frombytes(image_file['mode'], tuple(image_file['size']), data)
+        except Exception as e:
+            _log.warning(f"Ignoring broken cache entry {key}: {e}")
+            shutil.rmtree(entry, ignore_errors=True)
+            return None
+        # mtime is the LRU clock for eviction
+        os.utime(elements_file)
+        return records
+
+    def store(self, key, document, records):
+        """Save a converted batch; records may hold PIL images under 'image'."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        # write to a private directory first so a crash never leaves a half written entry
+        tmp_entry = self.root / f".tmp-{uuid.uuid4().hex}"
+        try:
+            (tmp_entry / "images").mkdir(parents=True)
+            document.save_as_json(tmp_entry / "document.json", image_mode=ImageRefMode.PLACEHOLDER)
+            stored = []
+            for n, record in enumerate(records):
+                record = dict(record)
+                image = record.pop('image', None)
+                if image is not None:
+                    path = f"images/{n}.raw"
+                    (tmp_entry / path).write_bytes(image.tobytes())
+                    record['image_file'] = {'path': path, 'mode': image.mode, 'size': image.size}
+                stored.append(record)
+            (tmp_entry / "elements.json").write_text(json.dumps(stored, ensure_ascii=False), encoding="utf-8")
+            entry = self.root / key
+            shutil.rmtree(entry, ignore_errors=True)
+            os.replace(tmp_entry, entry)
+        except Exception as e:
+            _log.warning(f"Could not cache conversion {key}: {e}")
+            shutil.rmtree(tmp_entry, ignore_errors=True)
+            return
+        self.evict()
+
+    def evict(self):
+        """Drop the least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        for entry in self.root.iterdir():
+            elements_file = entry / "elements.json"
+            if entry.is_dir() and elements_file.exists():
+                entries.append((elements_file.stat().st_mtime, dir_size(entry), entry))
+        total = sum(size for _mtime, size, _entry in entries)
+        for _mtime, size, entry in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+            _log.info(f"Evicted cache entry {entry.name}")
@@ -0,0 +1,233 @@
+import logging
+import threading
+import time
+
+import pypdfium2 as pdfium
+import pypdfium2.raw as pdfium_c
+from docling.datamodel.base_models import InputFormat
+from docling.datamodel.pipeline_options import PdfPipelineOptions
+from docling.document_converter import DocumentConverter, PdfFormatOption
+
+_log = logging.getLogger(__name__)
+
+IMAGE_RESOLUTION_SCALE = 2.0
+DIGITAL_IMAGES_SCALE = 1.5  # born-digital pages don't need the OCR resolution
+
+# "auto" picks one of the others per document from prescan()
+PIPELINE_PROFILES = ("auto", "full", "digital", "digital-no-tables")
+MIN_TEXT_CHARS = 30  # fewer extractable characters and the page is treated as scanned
+TABLE_PATH_OBJECTS = 40  # this many vector path objects on a page usually means ruled tables
+
+
+def default_pipeline_options():
+    """Pipeline options used by the app for every uploaded PDF."""
+    pipeline_options = PdfPipelineOptions()
+    pipeline_options.images_scale = IMAGE_RESOLUTION_SCALE
+    pipeline_options.do_ocr = True
+    pipeline_options.do_table_structure = True
+    pipeline_options.table_structure_options.do_cell_matching = True
+    pipeline_options.generate_page_images = True
+    pipeline_options.generate_picture_images = True
+    return pipeline_options
+
+
+def profile_options(profile, base_options=None):
+    """
+    Pipeline options of a named profile:
+      full               OCR, table structure, page images, images at IMAGE_RESOLUTION_SCALE (the original setup)
+      digital            text layer is used as is (no OCR), tables cropped on their own instead of keeping page images
+      digital-no-tables  like digital, without the TableFormer model
+    """
+    pipeline_options = (base_options or default_pipeline_options()).model_copy(deep=True)
+    if profile in ("digital", "digital-no-tables"):
+        pipeline_options.do_ocr = False
+        pipeline_options.images_scale = DIGITAL_IMAGES_SCALE
+        pipeline_options.generate_page_images = False
+        # tables still need an image for the left panel, without the page images
+        pipeline_options.generate_table_images = True
+    if profile == "digital-no-tables":
+        pipeline_options.do_table_structure = False
+    return pipeline_options
+
+
+def prescan(file_path, pages=None):
+    """
+    Per page facts read straight from the PDF: size of the text layer and whether it looks like it has tables.
+    Only the given 1-based pages are scanned when pages is set.
+    """
+    pdf = pdfium.PdfDocument(file_path)
+    scan = []
+    try:
+        for page_index in (range(len(pdf)) if pages is None else [p - 1 for p in pages]):
+            page = pdf[page_index]
+            textpage = page.get_textpage()
+            chars = textpage.count_chars()
+            textpage.close()
+            paths = 0
+            for _obj in page.get_objects(filter=[pdfium_c.FPDF_PAGEOBJ_PATH]):
+                paths += 1
+                if paths >= TABLE_PATH_OBJECTS:
+                    break
+            page.close()
+            scan.append({
+                'page': page_index + 1,
+                'chars': chars,
+                'has_text': chars >= MIN_TEXT_CHARS,
+                'table_like': paths >= TABLE_PATH_OBJECTS,
+            })
+    finally:
+        pdf.close()
+    return scan
+
+
+def choose_profile(scan):
+    if not all(page['has_text'] for page in scan):
+        return "full"
+    if any(page['table_like'] for page in scan):
+        return "digital"
+    return "digital-no-tables"
+
+
+def resolve_profile(file_path, profile, base_options=None, pages=None):
+    """(profile name, pipeline options) for a document, running the pre-scan (of the selected pages) for "auto"."""
+    if profile == "auto":
+        profile = choose_profile(prescan(file_path, pages))
+    return profile, profile_options(profile, base_options)
+
+
+def count_pages(file_path):
+    """Page count from the PDF itself (cheap, no docling models involved)."""
+    pdf = pdfium.PdfDocument(file_path)
+    try:
+        return len(pdf)
+    finally:
+        pdf.close()
+
+
+def parse_pages(text, total_pages):
+    """
+    Sorted 1-based page numbers from a selection like "1-3, 7, 10-". Empty text selects every page.
+    Raises ValueError for anything that isn't a page of the document.
+    """
+    text = text.strip()
+    if not text:
+        return list(range(1, total_pages + 1))
+    pages = set()
+    for part in text.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            first, last = (p.strip() for p in part.split("-", 1))
+            first = int(first) if first else 1
+            last = int(last) if last else total_pages
+        else:
+            first = last = int(part)
+        if first < 1 or last > total_pages or first > last:
+            raise ValueError(f"Invalid page range '{part}' (document has {total_pages} pages)")
+        pages.update(range(first, last + 1))
+    return sorted(pages)
+
+
+def format_pages(pages):
+    """Inverse of parse_pages: [1, 2, 3, 7] -> "1-3, 7"."""
+    return ", ".join(str(first) if first == last else f"{first}-{last}" for first, last in page_runs(pages))
+
+
+def page_runs(pages):
+    """Contiguous (first, last) runs of a sorted list of pages."""
+    runs = []
+    for page in pages:
+        if runs and page == runs[-1][1] + 1:
+            runs[-1] = (runs[-1][0], page)
+        else:
+            runs.append((page, page))
+    return runs
+
+
+def page_batches(total_pages, batch_size, pages=None):
+    """
+    Inclusive (first, last) ranges of at most batch_size pages covering 1..total_pages, or only the
+    given pages (each contiguous run of them is split on its own). batch_size 0 means no splitting.
+    """
+    runs = page_runs(pages) if pages is not None else [(1, total_pages)]
+    if not batch_size:
+        return runs
+    return [(first, min(first + batch_size - 1, last))
+            for run_first, last in runs for first in range(run_first, last + 1, batch_size)]
+
+
+def options_key(pipeline_options):
+    """Stable key for a set of pipeline options (used to share converters)."""
+    return pipeline_options.model_dump_json()
+
+
+def output_options_key(pipeline_options):
+    """
+    Key of the options that change the conversion output: the device and thread count
+    (accelerator_options) only change how fast it runs, so they are left out.
+    """
+    return pipeline_options.model_dump_json(exclude={'accelerator_options'})
+
+
+class ConverterRegistry:
+    """
+    Keeps one initialized DocumentConverter per effective set of pipeline options,
+    so the layout, TableFormer and OCR models are loaded once per app and not once per PDF.
+    """
+
+    def __init__(self):
+        self._converters = {}
+        self._lock = threading.Lock()
+        self.warmup_seconds = None
+
+    def get(self, pipeline_options):
+        """Return a warm converter for these options, building it on first use."""
+        key = options_key(pipeline_options)
+        # the lock also makes a caller wait for a warm-up that is still running
+        with self._lock:
+            converter = self._converters.get(key)
+            if converter is None:
+                start_time = time.time()
+                converter = DocumentConverter(
+                    format_options={
+                        # copy so later edits of the caller's options don't leak into a cached pipeline
+                        InputFormat.PDF: PdfFormatOption(pipeline_options=pipeline_options.model_copy(deep=True))
+                    }
+                )
+                converter.initialize_pipeline(InputFormat.PDF)
+                self._converters[key] = converter
+                _log.info(f"Converter initialized in {time.time() - start_time:.2f} seconds.")
+        return converter
+
+    def warm_up(self, pipeline_options, on_ready=None, on_failed=None):
+        """
+        Build the converter for these options (or list of options) in a background thread.
+        pipeline_options may also be a function returning them, called in that thread.
+        on_ready gets the warm-up time in seconds, on_failed the error message.
+        """
+        def run():
+            start_time = time.time()
+            try:
+                options_list = pipeline_options() if callable(pipeline_options) else pipeline_options
+                if not isinstance(options_list, (list, tuple)):
+                    options_list = [options_list]
+                for options in options_list:
+                    self.get(options)
+            except Exception as e:
+                _log.error(f"Converter warm-up failed: {e}")
+                if on_failed is not None:
+                    on_failed(str(e))
+                return
+            self.warmup_seconds = time.time() - start_time
+            _log.info(f"Models warmed up in {self.warmup_seconds:.2f} seconds.")
+            if on_ready is not None:
+                on_ready(self.warmup_seconds)
+
+        thread = threading.Thread(target=run, name="converter-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def clear(self):
+        with self._lock:
+            self._converters.clear()
@@ -0,0 +1,117 @@
+from collections import Counter
+
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex, QRect, QSize
+from PySide6.QtGui import QColor, QFontMetrics, QPalette, QPen
+from PySide6.QtWidgets import QListView, QStyle, QStyledItemDelegate
+
+from profiler import PROFILER
+
+PADDING = 5
+ROW_SPACING = 5
+
+
+class ElementListModel(QAbstractListModel):
+    """Element records (see extraction.py) shown in the left panel, one row per record."""
+    RecordRole = Qt.UserRole + 1
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.records = []
+        self.rows = {}  # record key -> row
+        self.counters = Counter()  # per-document numbering of tables/pictures
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.records)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        record = self.records[index.row()]
+        if role == ElementListModel.RecordRole:
+            return record
+        if role == Qt.DisplayRole and record['kind'] == 'text':
+            return record['text']
+        return None
+
+    def next_number(self, kind):
+        """1-based number of the next element of this kind in the current document."""
+        self.counters[kind] += 1
+        return self.counters[kind]
+
+    def record(self, key):
+        row = self.rows.get(key)
+        return None if row is None else self.records[row]
+
+    def append_records(self, records):
+        if not records:
+            return
+        first = len(self.records)
+        self.beginInsertRows(QModelIndex(), first, first + len(records) - 1)
+        for row, record in enumerate(records, start=first):
+            self.rows[record['key']] = row
+        self.records.extend(records)
+        self.endInsertRows()
+
+    def clear(self):
+        self.beginResetModel()
+        self.records = []
+        self.rows = {}
+        self.counters.clear()
+        self.endResetModel()
+
+
+class ElementDelegate(QStyledItemDelegate):
+    """Paints text and image rows; thumbnails are turned into pixmaps only when a row is painted."""
+
+    def __init__(self, load_pixmap, parent=None):
+        super().__init__(parent)
+        self.load_pixmap = load_pixmap  # (record, width) -> QPixmap of the row's thumbnail at that width
+
+    def row_width(self, option):
+        view = self.parent()
+        width = view.viewport().width() if isinstance(view, QListView) else option.rect.width()
+        return max(width, 2 * PADDING + 1)
+
+    def image_size(self, record, width):
+        image_width, image_height = record['thumbnail']['size']
+        # shrink wide images to the panel, never blow small ones up
+        shown_width = min(image_width, width)
+        return QSize(shown_width, max(int(image_height * shown_width / image_width), 1))
+
+    def sizeHint(self, option, index):
+        record = index.data(ElementListModel.RecordRole)
+        # per row and re-run on every resize: totals only, no trace span
+        with PROFILER.span("size_hint", trace=False):
+            width = self.row_width(option)
+            inner_width = width - 2 * PADDING  # same rect paint() draws into
+            if record['kind'] == 'text':
+                text_rect = QFontMetrics(option.font).boundingRect(
+                    QRect(0, 0, max(inner_width - 2 * PADDING, 1), 1 << 20), Qt.TextWordWrap, record['text'])
+                return QSize(width, text_rect.height() + 2 * PADDING + ROW_SPACING)
+            return QSize(width, self.image_size(record, inner_width).height() + ROW_SPACING)
+
+    def paint(self, painter, option, index):
+        record = index.data(ElementListModel.RecordRole)
+        # Qt painting cost per row kind, see the profiler panel (totals only, like size_hint)
+        with PROFILER.span(f"paint_{record['kind']}", trace=False):
+            rect = option.rect.adjusted(PADDING, 0, -PADDING, -ROW_SPACING)
+            painter.save()
+            if option.state & QStyle.State_Selected:
+                painter.fillRect(rect, option.palette.highlight())
+            if record['kind'] == 'text':
+                # same look as the old labels: red border for empty text (probably a formula), gray otherwise
+                if record['empty_text']:
+                    painter.setPen(QPen(QColor("red"), 2))
+                else:
+                    painter.setPen(QPen(QColor("gray"), 1))
+                painter.drawRect(rect.adjusted(0, 0, -1, -1))
+                painter.setPen(option.palette.color(QPalette.Text))
+                painter.drawText(rect.adjusted(PADDING, PADDING, -PADDING, -PADDING), Qt.TextWordWrap, record['text'])
+            else:
+                size = self.image_size(record, rect.width())
+                pixmap = self.load_pixmap(record, size.width())
+                x = rect.x() + (rect.width() - pixmap.width()) // 2
+                painter.drawPixmap(x, rect.y(), pixmap)
+            painter.restore()
@@ -0,0 +1,187 @@
+"""
+Streaming JSONL export of converted documents and confirmed questions:
+
+    <root>/<document name>/elements.jsonl   one element record per line, written as batches arrive
+    <root>/<document name>/source.txt       pipeline options that shape the elements (not device / threads)
+    <root>/questions.jsonl                  one confirmed question_data per line
+    <root>/images/<sha256>.png              every image once, referenced by its path relative to <root>
+
+Lines are appended and flushed per batch and images written as they come, so memory doesn't grow
+with the document. Every line has a 'key'; reopening a file skips the keys it already holds
+(resuming an interrupted export), and a line cut short by a crash is dropped first.
+Read them back with iter_jsonl. The app exports questions by default; element export PNG-encodes
+every image of every conversion, so it is opt-in (export_elements setting, batch.py --format export).
+"""
+import hashlib
+import json
+import logging
+import os
+import uuid
+from pathlib import Path
+
+from extraction import encode_png
+from store import content_hash
+
+_log = logging.getLogger(__name__)
+
+EXPORT_DIR = Path("scratch") / "export"
+
+
+def iter_jsonl(path):
+    """Records of a JSONL file one at a time; an unfinished last line is skipped."""
+    with open(path, "rb") as fp:
+        for line in fp:
+            if not line.endswith(b"\n"):
+                break  # being written, or cut short by a crash
+            if line.strip():
+                yield json.loads(line)
+
+
+def write_image(root, png):
+    """Store PNG bytes content addressed under root/images, return the path relative to root."""
+    digest = hashlib.sha256(png).hexdigest()
+    relative = f"images/{digest}.png"
+    path = Path(root) / relative
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{uuid.uuid4().hex}.tmp")
+        tmp_path.write_bytes(png)
+        os.replace(tmp_path, path)
+    return relative
+
+
+class JsonlWriter:
+    """Append-only JSONL file that knows which keys it already holds."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.keys = set()
+        self._fp = None
+        if self.path.exists():
+            self._drop_partial_line()
+            self.keys = {record['key'] for record in iter_jsonl(self.path)}
+
+    def _drop_partial_line(self):
+        with open(self.path, "rb+") as fp:
+            fp.seek(0, os.SEEK_END)
+            size = fp.tell()
+            if size == 0:
+                return
+            fp.seek(size - 1)
+            if fp.read(1) == b"\n":
+                return
+            # walk back to the end of the last complete line
+            position = size
+            while position > 0:
+                step = min(1 << 16, position)
+                fp.seek(position - step)
+                block = fp.read(step)
+                newline = block.rfind(b"\n")
+                if newline >= 0:
+                    position = position - step + newline + 1
+                    break
+                position -= step
+            _log.warning(f"Dropping an unfinished line at the end of {self.path}")
+            fp.truncate(position)
+
+    def __contains__(self, key):
+        return key in self.keys
+
+    def write(self, record):
+        """Append a record (it must have a 'key'); False if the file already has that key."""
+        if record['key'] in self.keys:
+            return False
+        if self._fp is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._fp = open(self.path, "a", encoding="utf-8")
+        self._fp.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.keys.add(record['key'])
+        return True
+
+    def flush(self):
+        if self._fp is not None:
+            self._fp.flush()
+
+    def close(self):
+        if self._fp is not None:
+            self._fp.close()
+            self._fp = None
+
+
+def element_key(record, first_page):
+    """
+    Key of an element line that doesn't depend on how the pages were batched: its page, kind,
+    label and box. Elements without a box fall back to the batch-prefixed self_ref.
+    """
+    if record.get('bbox') is None or record.get('page') is None:
+        return f"{first_page}:{record['ref']}"
+    box = "_".join(f"{v:.1f}" for v in record['bbox'])
+    return f"p{record['page']}:{record['kind']}:{record.get('label')}:{box}"
+
+
+class DocumentExporter:
+    """
+    elements.jsonl of one document, fed with the element records of each converted batch.
+    source identifies what produced the records (converter.output_options_key, device and threads left
+    out); elements exported with another source are dropped and the file starts over instead of being resumed.
+    """
+
+    def __init__(self, root, name, source=None):
+        self.root = Path(root)
+        directory = self.root / name
+        elements_file = directory / "elements.jsonl"
+        source_file = directory / "source.txt"
+        if source is not None:
+            if source_file.exists() and source_file.read_text(encoding="utf-8") != source:
+                _log.info(f"Options changed since {elements_file} was exported, exporting it again")
+                elements_file.unlink(missing_ok=True)
+            directory.mkdir(parents=True, exist_ok=True)
+            source_file.write_text(source, encoding="utf-8")
+        self.elements = JsonlWriter(elements_file)
+
+    def export_records(self, records, first_page):
+        """
+        Write the records of one batch (PIL images under 'image' are saved as PNG files), keyed by
+        element_key. Returns the records written.
+        """
+        written = 0
+        for record in records:
+            key = element_key(record, first_page)
+            if key in self.elements:
+                continue  # resumed export, or the page was in another batch before
+            record = dict(record, key=key)
+            image = record.pop('image', None)
+            if image is not None:
+                record['image'] = write_image(self.root, encode_png(image))
+            written += self.elements.write(record)
+        self.elements.flush()
+        return written
+
+    def close(self):
+        self.elements.close()
+
+
+class QuestionExporter:
+    """questions.jsonl: confirmed question_data, image entries pointing at their PNG file."""
+
+    def __init__(self, root=EXPORT_DIR):
+        self.root = Path(root)
+        self.questions = JsonlWriter(self.root / "questions.jsonl")
+
+    def export(self, question_data, images):
+        """Append a question ({sha256: png} for its images); False when the same question is already there."""
+        key = content_hash(question_data)
+        if key in self.questions:
+            return False
+        data = []
+        for entry in question_data['data']:
+            entry = dict(entry)
+            if 'sha256' in entry:
+                entry['image'] = write_image(self.root, images[entry['sha256']])
+            data.append(entry)
+        self.questions.write({'key': key, 'data': data, 'filter': question_data['filter']})
+        self.questions.flush()
+        return True
+
+    def close(self):
+        self.questions.close()
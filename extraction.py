@@ -0,0 +1,98 @@
+"""
+Qt-free extraction of docling items into plain element records.
+
+A record is a dict with at least 'kind' ('text', 'table' or 'picture'), 'ref' (the docling
+self_ref of the item), 'label' (docling item label: text, formula, list_item, section_header...),
+'page' (first provenance page, or None) and 'bbox' ([left, top, right, bottom] on that page,
+top-left origin, or None). Callers that convert in page batches add a 'key' that is unique
+across batches.
+"""
+import base64
+from collections import OrderedDict
+from io import BytesIO
+
+from docling_core.types.doc import PictureItem, TableItem, TextItem
+
+ENCODED_CACHE_SIZE = 32  # PNG images kept for repeated clicks
+# bumped whenever records gain or change fields, stored records (conversion_cache) of an older shape
+# are then converted again: 2 added 'label' and 'bbox'
+RECORD_VERSION = 2
+
+
+def element_page(element):
+    prov = getattr(element, 'prov', None)
+    if prov:
+        return prov[0].page_no
+    return None
+
+
+def element_bbox(element, document):
+    """First provenance box as [left, top, right, bottom] with a top-left origin, None without provenance."""
+    prov = getattr(element, 'prov', None)
+    if not prov:
+        return None
+    bbox = prov[0].bbox
+    page = document.pages.get(prov[0].page_no)
+    if page is not None:
+        bbox = bbox.to_top_left_origin(page_height=page.size.height)
+    return [round(bbox.l, 1), round(bbox.t, 1), round(bbox.r, 1), round(bbox.b, 1)]
+
+
+def extract_text(element):
+    """Return (text, empty_text) for a text item, with the same fallbacks the UI always used."""
+    text = getattr(element, 'text')
+    if text is None or text == '':
+        # to do: really make sure we are handling a chemical formula (there maby other scenarios where we fall here)
+        return getattr(element, 'orig', getattr(element, 'content', str(element))), True
+    return getattr(element, 'text', getattr(element, 'content', str(element))), False
+
+
+def extract_element(element, document):
+    """Turn one docling item into a record, or None for item types we don't show."""
+    record = {'ref': element.self_ref, 'label': str(element.label.value), 'page': element_page(element),
+              'bbox': element_bbox(element, document)}
+    if isinstance(element, (TableItem, PictureItem)):
+        image = element.get_image(document)
+        if image is None:
+            # happens when the pipeline kept neither page images nor element images
+            raise ValueError(f"no image available for {element.self_ref}")
+        record.update(kind='table' if isinstance(element, TableItem) else 'picture', image=image)
+    elif isinstance(element, TextItem):
+        text, empty_text = extract_text(element)
+        record.update(kind='text', text=text, empty_text=empty_text)
+    else:
+        return None
+    return record
+
+
+def encode_png(image):
+    buffered = BytesIO()
+    image.save(buffered, format="PNG")
+    return buffered.getvalue()
+
+
+def encode_image(image):
+    """PNG + base64 encode a PIL image, as sent to the /questions endpoint."""
+    return base64.b64encode(encode_png(image)).decode('utf-8')
+
+
+class EncodedImageCache:
+    """Small LRU of PNG encoded images keyed by element key, filled only when an element is selected."""
+
+    def __init__(self, max_entries=ENCODED_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+
+    def get(self, key, load_image):
+        encoded = self._entries.get(key)
+        if encoded is None:
+            encoded = encode_png(load_image())
+            self._entries[key] = encoded
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        else:
+            self._entries.move_to_end(key)
+        return encoded
+
+    def clear(self):
+        self._entries.clear()
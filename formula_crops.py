@@ -0,0 +1,88 @@
+"""
+Images of formula regions, for text items docling couldn't read (empty text, see extraction.extract_text).
+
+Regions are cropped from a pypdfium2 render of their page (one render per page however many
+formulas it has) using the item's provenance bbox, and cached as PNG by document hash + page + bbox,
+so re-opening a document or converting it with another profile doesn't render again.
+"""
+import logging
+import uuid
+from collections import defaultdict
+from pathlib import Path
+
+import pypdfium2 as pdfium
+from PIL import Image
+
+_log = logging.getLogger(__name__)
+
+FORMULA_DIR = Path("scratch") / "formulas"
+FORMULA_SCALE = 3.0  # 216 dpi, subscripts stay readable
+FORMULA_PADDING = 2.0  # points added around the bbox
+
+
+class FormulaCropper:
+    def __init__(self, root=FORMULA_DIR, scale=FORMULA_SCALE, padding=FORMULA_PADDING):
+        self.root = Path(root)
+        self.scale = scale
+        self.padding = padding
+
+    def path(self, file_digest, page_no, bbox):
+        box = "_".join(f"{v:.1f}" for v in bbox)
+        return self.root / file_digest / f"{page_no}_{box}@{self.scale}.png"
+
+    def crops(self, file_path, file_digest, regions):
+        """
+        PIL images of regions [(page_no, [left, top, right, bottom]) ...] (points, top-left origin),
+        in the same order; None where a region couldn't be cropped.
+        """
+        found = {}
+        missing = defaultdict(list)  # page -> bboxes that have to be rendered
+        for page_no, bbox in regions:
+            path = self.path(file_digest, page_no, bbox)
+            if path.exists():
+                try:
+                    image = Image.open(path)
+                    image.load()
+                    found[(page_no, tuple(bbox))] = image
+                    continue
+                except OSError as e:
+                    _log.warning(f"Ignoring broken formula crop {path}: {e}")
+            missing[page_no].append(bbox)
+
+        if missing:
+            pdf = pdfium.PdfDocument(file_path)
+            try:
+                for page_no, bboxes in missing.items():
+                    page = pdf[page_no - 1]
+                    page_image = page.render(scale=self.scale).to_pil()
+                    page.close()
+                    for bbox in bboxes:
+                        crop = self.crop(page_image, bbox)
+                        if crop is None:
+                            continue
+                        self.save(crop, self.path(file_digest, page_no, bbox))
+                        found[(page_no, tuple(bbox))] = crop
+            finally:
+                pdf.close()
+        return [found.get((page_no, tuple(bbox))) for page_no, bbox in regions]
+
+    def crop(self, page_image, bbox):
+        left, top, right, bottom = bbox
+        box = (
+            max(int((left - self.padding) * self.scale), 0),
+            max(int((top - self.padding) * self.scale), 0),
+            min(int((right + self.padding) * self.scale) + 1, page_image.width),
+            min(int((bottom + self.padding) * self.scale) + 1, page_image.height),
+        )
+        if box[2] <= box[0] or box[3] <= box[1]:
+            return None
+        return page_image.crop(box)
+
+    def save(self, image, path):
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f".{uuid.uuid4().hex}.tmp")
+            image.save(tmp_path, format="PNG")
+            tmp_path.replace(path)
+        except OSError as e:
+            _log.warning(f"Could not cache formula crop {path}: {e}")
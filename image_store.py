@@ -0,0 +1,116 @@
+import itertools
+import os
+import tempfile
+from collections import OrderedDict
+from pathlib import Path
+
+from PIL import Image
+from PySide6.QtGui import QImage, QPixmap
+
+THUMBNAIL_WIDTH = int(os.environ.get("PDF2JSON_THUMBNAIL_WIDTH", "480"))  # browsing tier, wide enough for the left panel
+# budget for decoded pixmaps (thumbnails on screen + full-resolution previews), in MB
+PIXMAP_CACHE_MB = int(os.environ.get("PDF2JSON_PIXMAP_CACHE_MB", "256"))
+# PIL modes whose raw bytes Qt reads as they are: QImage format, bytes per pixel
+QT_FORMATS = {
+    'RGB': (QImage.Format_RGB888, 3),
+    'RGBA': (QImage.Format_RGBA8888, 4),
+    'L': (QImage.Format_Grayscale8, 1),
+}
+
+
+def qt_compatible(image):
+    """The image itself if Qt can read its raw bytes, else an RGB(A) conversion."""
+    if image.mode in QT_FORMATS:
+        return image
+    return image.convert("RGBA" if "A" in image.getbands() or "transparency" in image.info else "RGB")
+
+
+def make_thumbnail(image, width=THUMBNAIL_WIDTH):
+    """
+    Small copy of an element image for the browsing tier (or, with another width, the preview
+    tier), downscaled once (in the worker thread) and already in a mode Qt reads without conversion.
+    It is spilled like the full image, only the pixmaps decoded from it (bounded by PixmapCache)
+    stay in memory.
+    """
+    thumbnail = qt_compatible(image)
+    # only width is bounded, tall tables keep a readable size
+    if thumbnail.width > width:
+        height = max(round(thumbnail.height * width / thumbnail.width), 1)
+        thumbnail = thumbnail.resize((width, height), Image.BICUBIC, reducing_gap=2.0)
+    return thumbnail
+
+
+def pixmap_from_raw(mode, size, data):
+    """
+    QPixmap of raw PIL bytes: a QImage over the buffer itself (no copy) and a single copy into the
+    pixmap, instead of PIL -> ImageQt -> QPixmap copying the whole bitmap at every step.
+    """
+    if mode not in QT_FORMATS:
+        image = qt_compatible(Image.frombytes(mode, tuple(size), data))
+        mode, data = image.mode, image.tobytes()
+    qt_format, channels = QT_FORMATS[mode]
+    width, height = size
+    # data must outlive the QImage, which it does: the QImage doesn't leave this function
+    return QPixmap.fromImage(QImage(data, width, height, width * channels, qt_format))
+
+
+class ImageSpill:
+    """
+    Element images written uncompressed (raw PIL bytes) to a temporary directory and read back
+    on demand, so converted documents don't keep every image in memory.
+    """
+
+    def __init__(self, root=None):
+        if root is not None:
+            Path(root).mkdir(parents=True, exist_ok=True)
+        self._dir = tempfile.TemporaryDirectory(prefix="pdf-to-json-", dir=root)
+        self._counter = itertools.count()
+
+    def put(self, image):
+        """Write an image and return the info needed to load it again."""
+        path = Path(self._dir.name) / f"{next(self._counter)}.raw"
+        data = image.tobytes()
+        path.write_bytes(data)
+        return {'path': str(path), 'mode': image.mode, 'size': image.size, 'bytes': len(data)}
+
+    def load(self, info):
+        return Image.frombytes(info['mode'], tuple(info['size']), Path(info['path']).read_bytes())
+
+    def load_pixmap(self, info):
+        """Straight from the spilled bytes to a pixmap, no PIL image in between."""
+        return pixmap_from_raw(info['mode'], info['size'], Path(info['path']).read_bytes())
+
+    def close(self):
+        self._dir.cleanup()
+
+
+def pixmap_bytes(pixmap):
+    return pixmap.width() * pixmap.height() * pixmap.depth() // 8
+
+
+class PixmapCache:
+    """LRU of decoded pixmaps bounded by their total size in bytes instead of an entry count."""
+
+    def __init__(self, budget_mb=PIXMAP_CACHE_MB):
+        self.budget_bytes = budget_mb * 1024 * 1024
+        self.used_bytes = 0
+        self._entries = OrderedDict()
+
+    def get(self, key, load):
+        pixmap = self._entries.get(key)
+        if pixmap is not None:
+            self._entries.move_to_end(key)
+            return pixmap
+        pixmap = load()
+        size = pixmap_bytes(pixmap)
+        if size <= self.budget_bytes:
+            self._entries[key] = pixmap
+            self.used_bytes += size
+            while self.used_bytes > self.budget_bytes:
+                _key, evicted = self._entries.popitem(last=False)
+                self.used_bytes -= pixmap_bytes(evicted)
+        return pixmap
+
+    def clear(self):
+        self._entries.clear()
+        self.used_bytes = 0
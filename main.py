@@ -1,10 +1,7 @@
 import sys
 import logging
-import time
-import base64
+import hashlib
 from pathlib import Path
-import json
-import requests
 from functools import partial
 from PySide6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout,
@@ -12,28 +9,41 @@ from PySide6.QtWidgets import (
     QMessageBox, QLabel, QTableWidget,
     QTableWidgetItem, QDialog, QHBoxLayout,
     QButtonGroup, QFormLayout, QLineEdit,
-    QFrame)
+    QFrame, QProgressBar, QListView, QComboBox,
+    QCheckBox)
 from PySide6.QtGui import QPixmap
-from PySide6.QtCore import Qt, Signal
+from PySide6.QtCore import Qt, Signal, QThread
 from PySide6.QtWidgets import QScrollArea
 
-from docling_core.types.doc import ImageRefMode, PictureItem, TableItem, TextItem
+from docling_core.types.doc import ImageRefMode
 
-from docling.datamodel.base_models import FigureElement, InputFormat, Table
-from docling.datamodel.pipeline_options import (PdfPipelineOptions, AcceleratorDevice, AcceleratorOptions)
-from docling.document_converter import DocumentConverter, PdfFormatOption
+from docling.datamodel.base_models import FigureElement, Table
+from docling.datamodel.pipeline_options import (AcceleratorDevice, AcceleratorOptions)
+
+from app_settings import apply_settings, autotune, load_settings, needs_autotune, save_settings
+from conversion_cache import ConversionCache
+from converter import (ConverterRegistry, PIPELINE_PROFILES, count_pages, format_pages, parse_pages,
+                       profile_options)
+from element_list import ElementDelegate, ElementListModel
+from export import QuestionExporter
+from extraction import EncodedImageCache, encode_png
+from formula_crops import FormulaCropper
+from image_store import ImageSpill, PixmapCache
+from page_picker import PagePickerDialog
+from profiler import PROFILER
+from profiler_panel import ProfilerPanel
+from question_review import QuestionReviewDialog
+from segmentation import segment
+from settings_dialog import SettingsDialog
+from store import SYNC_BATCH_SIZE, QuestionStore
+from submission import SubmissionQueue
+from worker import ConversionWorker
 
-from PIL.ImageQt import ImageQt  # Add this import at the top
-from io import BytesIO
 from PIL import Image
 
 _log = logging.getLogger(__name__)
 
-IMAGE_RESOLUTION_SCALE = 2.0
-headers = {
-    "Content-Type": "application/json"
-}
-url = "http://127.0.0.1:8000/questions"
+OUTPUT_DIR = Path("scratch")
 
 # --- Improvement 1: Reusable clickable component --- #
 class ClickableLabel(QLabel):
@@ -48,12 +58,20 @@ class ClickableLabel(QLabel):
         super().mousePressEvent(event)
 
 class PDFtoJSONApp(QWidget):
-    def __init__(self):
+    models_ready = Signal(float)  # emitted (from the warm-up thread) with the warm-up time in seconds
+    models_failed = Signal(str)  # emitted (from the warm-up thread) with the error
+    settings_tuned = Signal(dict, int)  # emitted (from the warm-up thread) with auto-tuned settings and their generation
+
+    def __init__(self, background_tasks=True, store_path=OUTPUT_DIR / "questions.db"):
+        # background_tasks=False skips model warm-up and outbox replay (benchmarks, scripted use),
+        # which also pass their own store_path so the operator's questions are left alone
         super().__init__()
         self.setWindowTitle("PDF to JSON Converter")
         self.setGeometry(100, 100, 800, 600)  # Larger initial size
 
         self.element_counter = 0
+        self.question_index = {}  # element id -> entry of question_data['data']
+        self.question_images = {}  # sha256 -> PNG bytes of the selected images
         # question structure
         self.question_data = {'data': [], 'filter': {
             'materia': '',
@@ -83,15 +101,66 @@ class PDFtoJSONApp(QWidget):
         # Left panel components
         self.upload_button = QPushButton("Upload PDF")
         self.upload_button.clicked.connect(self.upload_pdf)
-        self.left_layout.addWidget(self.upload_button)
+        upload_layout = QHBoxLayout()
+        upload_layout.addWidget(self.upload_button, 1)
+        # "auto" pre-scans the PDF and skips OCR / table structure when the document doesn't need them
+        self.profile_combo = QComboBox()
+        self.profile_combo.addItems(PIPELINE_PROFILES)
+        self.profile_combo.setToolTip("Pipeline profile")
+        upload_layout.addWidget(self.profile_combo)
+        # only the chosen pages go through docling
+        self.pages_edit = QLineEdit()
+        self.pages_edit.setPlaceholderText("Pages: all (e.g. 1-3, 7)")
+        upload_layout.addWidget(self.pages_edit)
+        self.pick_pages_checkbox = QCheckBox("Pick pages")
+        self.pick_pages_checkbox.setToolTip("Choose the pages from thumbnails before converting")
+        upload_layout.addWidget(self.pick_pages_checkbox)
+        # group the converted elements into questions and alternatives in one pass
+        self.segment_button = QPushButton("Find questions")
+        self.segment_button.clicked.connect(self.segment_questions)
+        upload_layout.addWidget(self.segment_button)
+        self.settings_button = QPushButton("Settings")
+        self.settings_button.clicked.connect(self.open_settings)
+        upload_layout.addWidget(self.settings_button)
+        self.left_layout.addLayout(upload_layout)
+
+        self.status_label = QLabel("Loading models...")
+        self.left_layout.addWidget(self.status_label)
+
+        # Conversion progress / cancel (the conversion itself runs in a ConversionWorker thread)
+        progress_layout = QHBoxLayout()
+        self.progress_bar = QProgressBar()
+        self.progress_bar.hide()
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.setEnabled(False)
+        self.cancel_button.clicked.connect(self.cancel_conversion)
+        progress_layout.addWidget(self.progress_bar)
+        progress_layout.addWidget(self.cancel_button)
+        self.left_layout.addLayout(progress_layout)
+        self.conversion_worker = None
+        self.encoded_images = EncodedImageCache()
+        self.conversion_threads = {}  # running QThread -> its ConversionWorker, kept referenced until finished
 
-        # Scroll area for left content
-        self.left_scroll = QScrollArea()
-        self.left_scroll.setWidgetResizable(True)
-        self.left_content = QWidget()
-        self.left_content_layout = QVBoxLayout(self.left_content)
-        self.left_scroll.setWidget(self.left_content)
-        self.left_layout.addWidget(self.left_scroll)
+        # Virtualized list for left content: only the visible rows are painted and decoded
+        self.image_spill = ImageSpill(OUTPUT_DIR)
+        self.element_model = ElementListModel(self)
+        self.pixmap_cache = PixmapCache()  # budget from PDF2JSON_PIXMAP_CACHE_MB
+        self.thumbnail_count = 0
+        self.thumbnail_bytes = 0
+        self.element_view = QListView()
+        self.element_view.setModel(self.element_model)
+        self.element_view.setItemDelegate(ElementDelegate(self.load_element_pixmap, self.element_view))
+        self.element_view.setVerticalScrollMode(QListView.ScrollPerPixel)
+        self.element_view.setResizeMode(QListView.Adjust)  # re-wrap rows when the panel width changes
+        self.element_view.setLayoutMode(QListView.Batched)
+        self.element_view.clicked.connect(self.on_element_clicked)
+        self.left_layout.addWidget(self.element_view)
+        self.memory_label = QLabel()
+        self.left_layout.addWidget(self.memory_label)
+        self.update_memory_label()
+        # per-stage timings, counters and memory of the conversion and the UI (collapsed by default)
+        self.profiler_panel = ProfilerPanel(PROFILER)
+        self.left_layout.addWidget(self.profiler_panel)
 
         # --- New Right Panel Structure ---
         # Create an input area widget for fixed controls
@@ -163,8 +232,17 @@ class PDFtoJSONApp(QWidget):
         self.right_layout.addSpacing(10)
         self.right_layout.addWidget(self.add_image_button)
         
+        self.resend_button = QPushButton("Resend failed")
+        self.resend_button.clicked.connect(self.replay_submissions)
+        self.right_layout.addSpacing(10)
+        self.right_layout.addWidget(self.resend_button)
+
+        self.submission_label = QLabel()
+        self.submission_label.setWordWrap(True)
+        self.right_layout.addWidget(self.submission_label)
+
         self.clear_button = QPushButton("Clear")
-        self.clear_button.clicked.connect(self.clear_right_panel)
+        self.clear_button.clicked.connect(self.discard_question)
         self.right_layout.addSpacing(10)
         self.right_layout.addWidget(self.clear_button)
 
@@ -175,7 +253,120 @@ class PDFtoJSONApp(QWidget):
 
         # Initialize other components
         self.file_dialog = QFileDialog()
-        self.pipeline_options = PdfPipelineOptions()
+        # device / threads / batch sizes from settings.json and PDF2JSON_* environment variables
+        self.settings = load_settings()
+        self.pipeline_options = apply_settings(self.settings)
+        self.settings_generation = 0  # bumped when the operator saves settings, stale auto-tune results are dropped
+        self.warming_up = False
+        self.warm_up_again = False  # settings changed during a warm-up, warm up again once it is done
+
+        # Questions are posted from a background queue; leftovers of earlier sessions are resent
+        self.submissions = SubmissionQueue(parent=self)
+        self.submissions.queued.connect(self.on_submission_queued)
+        self.submissions.sent.connect(self.on_submission_sent)
+        self.submissions.retrying.connect(self.on_submission_retrying)
+        self.submissions.failed.connect(self.on_submission_failed)
+
+        # Drafted and confirmed questions survive restarts; only unsent or changed ones are synced
+        self.question_store = QuestionStore(store_path)
+        self.question_store.reconcile(self.submissions.outbox_dir, self.submissions.rejected_dir)
+        self.current_question_id = None  # store id of the question in the right panel
+        self.syncing = set()  # submission ids of the current sync batch
+        for edit in (self.assunto_edit, self.sub_assunto_edit, self.faculdade_edit, self.ano_edit):
+            edit.editingFinished.connect(self.save_draft)
+        draft_id = self.question_store.latest_draft()
+        if draft_id is not None:
+            self.restore_question(draft_id)
+        if background_tasks:
+            self.submissions.replay()
+            self.sync_questions()
+
+        # One warm converter for the whole app: load the models in the background right away
+        self.converters = ConverterRegistry()
+        # re-opening a PDF that was already converted skips docling entirely
+        self.conversion_cache = ConversionCache(OUTPUT_DIR / "cache")
+        # formulas docling can't read are offered as images cropped from the page
+        self.formula_cropper = FormulaCropper(OUTPUT_DIR / "formulas")
+        self.question_exporter = QuestionExporter(OUTPUT_DIR / "export")
+        self.models_ready.connect(self.on_models_ready)
+        self.models_failed.connect(self.on_models_failed)
+        self.settings_tuned.connect(self.on_settings_tuned)
+        if background_tasks:
+            self.start_warm_up()
+
+    def start_warm_up(self, rebuild=False):
+        """
+        Load the models for the current settings in the background (auto-tuning them first if needed).
+        rebuild drops the converters built with earlier settings. Only one warm-up runs at a time.
+        """
+        if self.warming_up:
+            self.warm_up_again = True
+            return
+        self.warming_up = True
+        if rebuild:
+            self.converters.clear()
+        settings = dict(self.settings)
+        pipeline_options = self.pipeline_options
+        generation = self.settings_generation
+        tuning = needs_autotune(settings)
+
+        def prepare():
+            # runs in the warm-up thread, on its own copy of the settings; the GUI thread applies
+            # and saves what auto-tune picked (on_settings_tuned)
+            options = pipeline_options
+            if tuning:
+                tuned = autotune(settings)
+                self.settings_tuned.emit(tuned, generation)
+                options = apply_settings(tuned)
+            # every profile "auto" can pick: born-digital exams without ruled tables (most of them) get
+            # digital-no-tables, those with tables digital, scans full
+            return [profile_options(profile, options)
+                    for profile in ("digital-no-tables", "digital", "full")]
+
+        if tuning:
+            self.status_label.setText("Benchmarking pipeline settings for this machine...")
+            # a conversion now would use the settings being replaced, next to the benchmark
+            self.upload_button.setEnabled(False)
+        else:
+            self.status_label.setText("Loading models...")
+        self.converters.warm_up(prepare, on_ready=self.models_ready.emit, on_failed=self.models_failed.emit)
+
+    def on_settings_tuned(self, settings, generation):
+        if generation != self.settings_generation:
+            return  # the operator saved other settings meanwhile, those win
+        self.settings = settings
+        save_settings(self.settings)
+        self.pipeline_options = apply_settings(self.settings)
+
+    def on_models_ready(self, seconds):
+        self.status_label.setText(
+            f"Models ready (warm-up {seconds:.1f}s, {self.settings['device']}, {self.settings['num_threads']} threads)")
+        self.warm_up_done()
+
+    def on_models_failed(self, error):
+        # converting still builds the converter on first use, and shows the error if it fails again
+        self.status_label.setText(f"Loading models failed: {error}")
+        self.warm_up_done()
+
+    def warm_up_done(self):
+        self.warming_up = False
+        self.upload_button.setEnabled(True)
+        if self.warm_up_again:
+            self.warm_up_again = False
+            # auto-tune may have changed the process wide docling settings after they were saved
+            self.pipeline_options = apply_settings(self.settings)
+            self.start_warm_up(rebuild=True)
+
+    def open_settings(self):
+        dialog = SettingsDialog(self.settings, self)
+        if dialog.exec() != QDialog.Accepted:
+            return
+        self.settings = dialog.result_settings()
+        self.settings_generation += 1
+        save_settings(self.settings)
+        self.pipeline_options = apply_settings(self.settings)
+        # pipelines built with the old device / threads are dropped and the new ones warmed
+        self.start_warm_up(rebuild=True)
 
     def add_image(self):
         """
@@ -216,33 +407,222 @@ class PDFtoJSONApp(QWidget):
             if subject in self.selected_subjects:
                 self.selected_subjects.remove(subject)
         print("Selected subjects:", self.selected_subjects)
+        self.save_draft()
+
+    def current_filter(self):
+        return {
+            'materia': list(self.selected_subjects),
+            'assunto': [self.assunto_edit.text()],
+            'subAssunto': [self.sub_assunto_edit.text()],
+            'faculdade': self.faculdade_edit.text(),
+            'ano': self.ano_edit.text(),
+        }
+
+    def save_draft(self):
+        """Write the question in the right panel to the store (called after every edit)."""
+        if self.current_question_id is None and not self.question_data['data']:
+            return  # nothing worth keeping yet
+        self.question_data['filter'] = self.current_filter()
+        self.current_question_id = self.question_store.save(
+            self.current_question_id, self.question_data, self.question_images)
 
     def confirm_inputs(self):
         """Function called when the Confirm button is clicked."""
-        assunto = self.assunto_edit.text()
-        sub_assunto = self.sub_assunto_edit.text()
-        faculdade = self.faculdade_edit.text()
-        ano = self.ano_edit.text()
-        self.question_data['filter']['materia'] = self.selected_subjects
-        self.question_data['filter']['assunto'] = [assunto]
-        self.question_data['filter']['subAssunto'] = [sub_assunto]
-        self.question_data['filter']['faculdade'] = faculdade
-        self.question_data['filter']['ano'] = ano
-
-        response = requests.post(url=url, headers=headers, data=json.dumps(self.question_data, ensure_ascii=False))
-        
-        print(response.json())
+        self.question_data['filter'] = self.current_filter()
+        duplicate = self.question_store.duplicate_of(self.current_question_id, self.question_data)
+        if duplicate is not None:
+            QMessageBox.information(self, "Duplicate", f"This question was already submitted (question #{duplicate}).")
+            return
+
+        with PROFILER.span("confirm_inputs", entries=len(self.question_data['data'])):
+            self.current_question_id = self.question_store.save(
+                self.current_question_id, self.question_data, self.question_images)
+            if not self.question_store.confirm(self.current_question_id):
+                self.submission_label.setText("Already sent, nothing changed since")
+                return
+            self.export_question(self.question_data, self.question_images)
+            # sent in the background, the operator can go on with the next question right away
+            self.sync_questions()
+
+    def segment_questions(self):
+        """Split the converted document into questions and let the operator review them."""
+        with PROFILER.span("segment", records=len(self.element_model.records)):
+            questions = segment(self.element_model.records)
+        if not questions:
+            QMessageBox.information(self, "Find questions", "No numbered questions found in the converted elements.")
+            return
+        dialog = QuestionReviewDialog(questions, self)
+        if dialog.exec() != QDialog.Accepted:
+            return
+        if dialog.action == 'load':
+            question = dialog.current_question()
+            if question is not None:
+                self.load_segmented_question(question)
+        elif dialog.action == 'confirm':
+            self.confirm_segmented_questions(dialog.checked_questions())
+
+    def load_segmented_question(self, question):
+        """Put a segmented question in the right panel, as if its elements had been clicked."""
+        self.clear_right_panel()
+        for entry in question['entries']:
+            if entry['kind'] == 'image':
+                record = self.element_model.record(entry['key'])
+                if record is not None:
+                    self.show_image_preview(record)
+                continue
+            label = self.add_text_label(self.element_counter, entry['text'])
+            if entry['type'] == 'point':
+                label.setStyleSheet("border: 2px solid green; padding: 5px; margin-bottom: 5px;")
+            self.add_question_entry({
+                "id": self.element_counter,
+                "value": entry['text'],
+                "type": entry['type'],
+            })
+            self.element_counter += 1
+
+    def segmented_question_data(self, question):
+        """(question_data, {sha256: png}) of a segmented question with the filter of the right panel."""
+        data = []
+        images = {}
+        for entry in question['entries']:
+            if entry['kind'] == 'image':
+                record = self.element_model.record(entry['key'])
+                if record is None:
+                    continue
+                png = encode_png(self.image_spill.load(record['image_file']))
+                digest = hashlib.sha256(png).hexdigest()
+                images[digest] = png
+                data.append({"id": len(data), "sha256": digest, "type": 'image'})
+            else:
+                data.append({"id": len(data), "value": entry['text'], "type": entry['type']})
+        return {'data': data, 'filter': self.current_filter()}, images
+
+    def confirm_segmented_questions(self, questions):
+        """Store and sync every reviewed question, skipping the ones already submitted."""
+        confirmed = 0
+        duplicates = 0
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            for question in questions:
+                with PROFILER.span("confirm_segmented", entries=len(question['entries'])):
+                    question_data, images = self.segmented_question_data(question)
+                    if self.question_store.duplicate_of(None, question_data) is not None:
+                        duplicates += 1
+                        continue
+                    question_id = self.question_store.save(None, question_data, images)
+                    self.question_store.confirm(question_id)
+                    self.export_question(question_data, images)
+                    confirmed += 1
+        finally:
+            QApplication.restoreOverrideCursor()
+        self.submission_label.setText(f"{confirmed} questions confirmed, {duplicates} already submitted")
+        self.sync_questions()
+
+    def export_question(self, question_data, images):
+        if not self.settings['export_jsonl']:
+            return
+        try:
+            self.question_exporter.export(question_data, images)
+        except OSError as e:
+            print(f"Question export failed: {e}")
+
+    def sync_questions(self):
+        """Queue the confirmed questions the backend doesn't have (in this version) yet, a batch at a time."""
+        if self.syncing:
+            return  # the next batch goes once this one is done
+        for question_id in self.question_store.unsynced(SYNC_BATCH_SIZE):
+            question_data, images = self.question_store.load(question_id)
+            try:
+                submission_id = self.submissions.submit(question_data, images)
+            except OSError as e:
+                # still 'ready' in the store, the next sync tries again
+                self.submission_label.setText(f"Could not write the outbox: {e}")
+                return
+            self.question_store.mark_sending(question_id, submission_id)
+            self.syncing.add(submission_id)
+
+    def on_submission_queued(self, submission_id, pending):
+        self.submission_label.setText(f"Sending... ({pending} pending)")
+
+    def on_submission_sent(self, submission_id, response):
+        print(response)
+        self.question_store.mark_sent(submission_id)
+        self.submission_label.setText(f"Sent ({self.submissions.pending_count()} pending)")
+        if submission_id in self.syncing:
+            self.syncing.discard(submission_id)
+            self.sync_questions()
+
+    def on_submission_retrying(self, submission_id, attempt, error):
+        self.submission_label.setText(f"Backend error ({error}), retrying (attempt {attempt})...")
+
+    def on_submission_failed(self, submission_id, error):
+        print(f"Submission {submission_id} failed: {error}")
+        if (self.submissions.rejected_dir / f"{submission_id}.json").exists():
+            self.question_store.mark_rejected(submission_id)
+        # still in the outbox otherwise, "Resend failed" or the next start retries it
+        self.syncing.discard(submission_id)
+        self.submission_label.setText(f"Failed, saved in {self.submissions.outbox_dir} for replay: {error}")
+
+    def replay_submissions(self):
+        replayed = self.submissions.replay()
+        if not replayed:
+            self.submission_label.setText("Nothing to resend")
 
     def clear_layout(self):
-        while self.left_content_layout.count():
-            item = self.left_content_layout.takeAt(0)
-            widget = item.widget()
-            if widget:
-                widget.deleteLater()
+        self.encoded_images.clear()
+        self.pixmap_cache.clear()
+        self.thumbnail_count = 0
+        self.thumbnail_bytes = 0
+        self.element_model.clear()
+        # spilled images of the previous document are deleted with their directory
+        self.image_spill.close()
+        self.image_spill = ImageSpill(OUTPUT_DIR)
+        self.update_memory_label()
+        self.clear_right_panel()
+
+    def discard_question(self):
+        """Clear button: drop the draft in the right panel (confirmed questions stay in the store)."""
+        if self.current_question_id is not None:
+            self.question_store.discard_draft(self.current_question_id)
+        self.clear_right_panel()
+
+    def restore_question(self, question_id):
+        """Put a stored question back in the right panel."""
+        loaded = self.question_store.load(question_id)
+        if loaded is None:
+            return
         self.clear_right_panel()
+        question_data, images = loaded
+        self.question_data = question_data
+        self.question_index = {entry['id']: entry for entry in question_data['data']}
+        self.question_images = {digest: png for digest, png in images.items() if png is not None}
+        self.element_counter = len(question_data['data'])
+        self.current_question_id = question_id
+
+        question_filter = question_data['filter']
+        self.selected_subjects = list(question_filter['materia'])
+        for button in self.mat_button_group.buttons():
+            button.setChecked(button.text() in self.selected_subjects)
+        self.assunto_edit.setText(question_filter['assunto'][0])
+        self.sub_assunto_edit.setText(question_filter['subAssunto'][0])
+        self.faculdade_edit.setText(question_filter['faculdade'])
+        self.ano_edit.setText(question_filter['ano'])
+
+        for entry in question_data['data']:
+            if 'sha256' in entry:
+                pixmap = QPixmap()
+                pixmap.loadFromData(self.question_images.get(entry['sha256'], b""))
+                self.add_image_label(entry['id'], pixmap)
+            else:
+                label = self.add_text_label(entry['id'], entry['value'])
+                if entry['type'] == 'point':
+                    label.setStyleSheet("border: 2px solid green; padding: 5px; margin-bottom: 5px;")
 
     def clear_right_panel(self):
+        self.current_question_id = None
         self.element_counter = 0
+        self.question_index = {}
+        self.question_images = {}
         while self.previews_layout.count():
             item = self.previews_layout.takeAt(0)
             widget = item.widget()
@@ -265,88 +645,194 @@ class PDFtoJSONApp(QWidget):
         self.ano_edit.clear()
 
     def upload_pdf(self):
-        output_dir = Path("scratch")
-        self.pipeline_options.images_scale = IMAGE_RESOLUTION_SCALE
-        self.pipeline_options.do_ocr = True
-        self.pipeline_options.do_table_structure = True
-        self.pipeline_options.table_structure_options.do_cell_matching = True
-        self.pipeline_options.generate_page_images = True
-        self.pipeline_options.generate_picture_images = True
         file_path, _ = self.file_dialog.getOpenFileName(self, "Open PDF File", "", "PDF Files (*.pdf)")
 
-        doc_converter = DocumentConverter(
-            format_options={
-                InputFormat.PDF: PdfFormatOption(pipeline_options=self.pipeline_options)
-            }
-        )
-
         if file_path:
             try:
-                start_time = time.time()
-                conv_res = doc_converter.convert(file_path)
-                
-                output_dir.mkdir(parents=True, exist_ok=True)
-                doc_filename = conv_res.input.file.stem
-                
-                 # Clear previous content
-                self.clear_layout()
-                
-                # Process elements with individual error handling
-                for element, _level in conv_res.document.iterate_items():
-                    try:
-                        if isinstance(element, TableItem):
-                            self.process_table(element, conv_res.document, output_dir, doc_filename)
-                        elif isinstance(element, PictureItem):
-                            self.process_picture(element, conv_res.document, output_dir, doc_filename)
-                        elif isinstance(element, TextItem):
-                            self.process_text(element)
-                    except Exception as e:
-                        error_msg = f"Error processing element {type(element).__name__}: {str(e)}"
-                        print(error_msg)
-                        QMessageBox.warning(self, "Processing Warning", error_msg)
-
-                # Add spacer to push content to top
-                self.left_content_layout.addStretch()
-                
-                # Save converted pdf
-                #md_filename = output_dir / f"{doc_filename}-with-images.md"
-                #conv_res.document.save_as_html(md_filename, image_mode=ImageRefMode.EMBEDDED)
-                
-                end_time = time.time() - start_time
-                _log.info(f"Document processed in {end_time:.2f} seconds.")
-                
+                PROFILER.snapshot(f"upload {Path(file_path).name}")
+                # only one conversion at a time, and the old one has to be stopped before the page
+                # count / picker below: pdfium must not be used from two threads at once
+                self.stop_conversions()
+                with PROFILER.span("choose_pages"):
+                    pages = self.choose_pages(file_path)
+                # the selection was for this file, the next one starts from all pages again
+                self.pages_edit.clear()
+                if pages is False:
+                    return
+                # Clear previous content
+                with PROFILER.span("clear_layout"):
+                    self.clear_layout()
+
+                # Run docling in a worker thread; elements arrive in page chunks through signals
+                thread = QThread()
+                worker = ConversionWorker(self.converters, self.pipeline_options, file_path, self.image_spill,
+                                          cache=self.conversion_cache, profile=self.profile_combo.currentText(),
+                                          pages=pages, page_batch_size=self.settings['page_batch_size'],
+                                          formula_cropper=self.formula_cropper if self.settings['formula_crops'] else None,
+                                          export_dir=OUTPUT_DIR / "export" if self.settings['export_elements'] else None,
+                                          preview_width=self.preview_width())
+                worker.moveToThread(thread)
+                thread.started.connect(worker.run)
+                self.connect_conversion_worker(worker)
+                for signal in (worker.failed, worker.cancelled, worker.finished):
+                    signal.connect(thread.quit)
+                # keep both alive until the thread is done, even after a cancel
+                thread.finished.connect(lambda: self.conversion_threads.pop(thread, None))
+                self.conversion_threads[thread] = worker
+                self.conversion_worker = worker
+
+                self.progress_bar.setRange(0, 0)  # busy until the page count is known
+                self.progress_bar.show()
+                self.cancel_button.setEnabled(True)
+                pages_text = "" if pages is None else f" (pages {format_pages(pages)})"
+                self.status_label.setText(f"Converting {Path(file_path).name}{pages_text}...")
+                thread.start()
+
             except Exception as e:
                 QMessageBox.critical(self, "Critical Error", f"Failed to process PDF:\n{e}")
 
-    def process_table(self, element, document, output_dir, doc_filename):
+    def choose_pages(self, file_path):
+        """
+        Pages to convert from the page field and, if enabled, the thumbnail picker.
+        None means the whole document, False means the upload was called off.
+        """
+        total_pages = count_pages(file_path)
         try:
-            table_counter = len([w for w in self.left_content.findChildren(QLabel) if "table" in w.objectName()]) + 1
-            image = element.get_image(document)
-            
-            # Encode the image to base64
-            buffered = BytesIO()
-            image.save(buffered, format="PNG")
-            encoded_img = base64.b64encode(buffered.getvalue()).decode('utf-8')
+            pages = parse_pages(self.pages_edit.text(), total_pages)
+        except ValueError as e:
+            QMessageBox.warning(self, "Pages", str(e))
+            return False
+        if self.pick_pages_checkbox.isChecked():
+            dialog = PagePickerDialog(file_path, pages if len(pages) < total_pages else None, self)
+            if dialog.exec() != QDialog.Accepted:
+                return False
+            pages = dialog.selected_pages() or pages
+        if len(pages) == total_pages:
+            return None
+        return pages
+
+    def conversion_worker_slots(self, worker):
+        return [
+            (worker.progress, self.on_conversion_progress),
+            (worker.chunk_ready, self.on_elements_ready),
+            (worker.first_elements, self.on_first_elements),
+            (worker.profile_chosen, self.on_profile_chosen),
+            (worker.element_failed, self.on_element_failed),
+            (worker.failed, self.on_conversion_failed),
+            (worker.finished, self.on_conversion_finished),
+        ]
+
+    def connect_conversion_worker(self, worker):
+        for signal, slot in self.conversion_worker_slots(worker):
+            signal.connect(slot)
+
+    def release_conversion_worker(self):
+        """Stop listening to the current worker and reset the progress widgets."""
+        if self.conversion_worker is not None:
+            for signal, slot in self.conversion_worker_slots(self.conversion_worker):
+                signal.disconnect(slot)
+        self.conversion_worker = None
+        self.cancel_button.setEnabled(False)
+        self.progress_bar.hide()
+
+    def cancel_conversion(self):
+        if self.conversion_worker is not None:
+            # the worker stops at its next check point and its thread quits on its own
+            self.conversion_worker.cancel()
+            self.release_conversion_worker()
+            self.status_label.setText("Conversion cancelled")
+
+    def stop_conversions(self):
+        """Cancel the current conversion and wait until no worker thread runs anymore."""
+        self.cancel_conversion()
+        if not self.conversion_threads:
+            return
+        # a running docling step can't be interrupted, this waits for the current page batch
+        self.status_label.setText("Stopping the current conversion...")
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            for thread in list(self.conversion_threads):
+                thread.wait()
+        finally:
+            QApplication.restoreOverrideCursor()
+
+    def closeEvent(self, event):
+        self.submissions.stop()
+        # also so Qt doesn't destroy a running thread
+        self.stop_conversions()
+        self.save_draft()
+        self.question_store.close()
+        self.question_exporter.close()
+        super().closeEvent(event)
+
+    def on_conversion_progress(self, done_pages, total_pages):
+        self.progress_bar.setRange(0, total_pages)
+        self.progress_bar.setValue(done_pages)
+
+    def on_profile_chosen(self, profile):
+        self.status_label.setText(f"{self.status_label.text()} [{profile} pipeline]")
+
+    def on_first_elements(self, seconds):
+        _log.info(f"First elements ready in {seconds:.2f} seconds.")
+        self.status_label.setText(f"First elements ready in {seconds:.2f}s, converting the rest...")
+
+    def on_elements_ready(self, records):
+        """Add a chunk of converted elements to the left panel."""
+        rows = []
+        for record in records:
+            try:
+                with PROFILER.span(f"process_{record['kind']}"):
+                    if record['kind'] == 'table':
+                        rows.append(self.process_table(record))
+                    elif record['kind'] == 'picture':
+                        rows.append(self.process_picture(record))
+                    elif record['kind'] == 'formula':
+                        rows.append(self.process_formula(record))
+                    elif record['kind'] == 'text':
+                        rows.append(self.process_text(record))
+            except Exception as e:
+                self.on_element_failed(f"Error processing element {record['kind']}: {str(e)}")
+        rows = [row for row in rows if row is not None]
+        for row in rows:
+            if 'thumbnail' in row:
+                self.thumbnail_count += 1
+                self.thumbnail_bytes += row['thumbnail']['bytes']
+        # one row insertion (and layout pass) per chunk
+        with PROFILER.span("append_rows", rows=len(rows)):
+            self.element_model.append_records(rows)
+        self.update_memory_label()
+
+    def on_element_failed(self, error_msg):
+        print(error_msg)
+        QMessageBox.warning(self, "Processing Warning", error_msg)
+
+    def on_conversion_failed(self, error):
+        self.release_conversion_worker()
+        self.status_label.setText("Conversion failed")
+        QMessageBox.critical(self, "Critical Error", f"Failed to process PDF:\n{error}")
+
+    def on_conversion_finished(self, seconds):
+        self.release_conversion_worker()
+        self.status_label.setText(f"Document processed in {seconds:.2f} seconds.")
+        _log.info(f"Document processed in {seconds:.2f} seconds.")
+        PROFILER.snapshot("conversion finished")
+        self.profiler_panel.refresh()
+
+        # Save converted pdf
+        #md_filename = output_dir / f"{doc_filename}-with-images.md"
+        #conv_res.document.save_as_html(md_filename, image_mode=ImageRefMode.EMBEDDED)
+
+    def process_table(self, record):
+        try:
+            table_counter = self.element_model.next_number('table')
+            record['number'] = table_counter
 
             #element_image_filename = output_dir / f"{doc_filename}-table-{table_counter}.png"
             #with element_image_filename.open("wb") as fp:
             #    image.save(fp, "PNG")
 
-            qimage = ImageQt(image)
-            pixmap = QPixmap.fromImage(qimage)
-            
-            table_label = ClickableLabel()
-            table_label.setObjectName(f"table_{table_counter}")
-            table_label.setPixmap(pixmap)  # Scale for left panel
-            table_label.setAlignment(Qt.AlignCenter)
-            
-            # Store full-size pixmap in the table_label
-            table_label.full_pixmap = pixmap
-            
-            # Connect click handler
-            table_label.clicked.connect(lambda: self.show_image_preview(table_label, encoded_img))
-
-            self.left_content_layout.addWidget(table_label)
+            # The row is painted by ElementDelegate; pixels are loaded only while the row is visible
+            return record
             
         except Exception as e:
             raise Exception(f"Table processing failed: {str(e)}") from e
@@ -399,45 +885,100 @@ class PDFtoJSONApp(QWidget):
         except Exception as e:
             QMessageBox.warning(self, "Table Error", 
                             f"Couldn't show table details:\n{str(e)}")
-    def show_image_preview(self, label, encoded_img):
+    def show_image_preview(self, record):
         """Show the full-size table in the right panel"""
         try:
-            # Scale pixmap to fit right panel width while maintaining aspect ratio
-            scaled_pix = label.full_pixmap.scaledToWidth(
-                self.right_panel.width() - 20,  # 20px padding
-                Qt.SmoothTransformation
-            )
-            
-            #self.preview_label.setPixmap(scaled_pix)
-            #self.preview_label.setAlignment(Qt.AlignCenter)
-            preview = ClickableLabel()
-            preview.setProperty("element_id", self.element_counter)
-            preview.setPixmap(scaled_pix)
-            preview.setAlignment(Qt.AlignCenter)
-            #self.right_layout.addWidget(preview)
-            self.previews_layout.addWidget(preview)
-            self.question_data['data'].append({
+            load_image = lambda: self.image_spill.load(record['image_file'])
+            # PNG encoding only happens for images that actually get selected
+            with PROFILER.span("png_encode"):
+                png = self.encoded_images.get(record['key'], load_image)
+            # the question references the image by content hash, the bytes travel separately
+            digest = hashlib.sha256(png).hexdigest()
+            if digest not in self.question_images:
+                PROFILER.count("bytes.png", len(png))
+            self.question_images[digest] = png
+
+            with PROFILER.span("preview_pixmap"):
+                preview_pixmap = self.load_preview_pixmap(record, self.preview_width())
+
+            self.add_image_label(self.element_counter, preview_pixmap)
+            self.add_question_entry({
                 "id": self.element_counter,
-                "value": encoded_img,
+                "sha256": digest,
                 "type": 'image',
             })
             self.element_counter += 1
+            self.update_memory_label()
             #preview.clicked.connect(lambda: self.clear_panel_element(preview))
         except Exception as e:
             QMessageBox.warning(self, "Preview Error", 
                               f"Failed to show table preview:\n{str(e)}")
+
+    def preview_width(self):
+        return self.right_panel.width() - 20  # 20px padding
+
+    def load_preview_pixmap(self, record, width):
+        """
+        Element pixmap at the right panel width, kept in the pixmap cache. The smallest tier the worker
+        already downscaled that is wide enough is used: the thumbnail, the preview (made at the panel
+        width of the upload) or, for images no wider than that, the full image; only a panel resized
+        since makes the GUI thread scale.
+        """
+        if width <= record['thumbnail']['size'][0]:
+            return self.load_element_pixmap(record, width)
+        preview = record.get('preview')
+        tier = preview if preview is not None and width <= preview['size'][0] else record['image_file']
+
+        def load():
+            # straight from the spilled raw bytes
+            pixmap = self.image_spill.load_pixmap(tier)
+            if pixmap.width() > width:
+                pixmap = pixmap.scaledToWidth(width, Qt.SmoothTransformation)
+            return pixmap
+        return self.pixmap_cache.get(('preview', record['key'], width), load)
+
+    def add_image_label(self, element_id, pixmap):
+        # Scale pixmap to fit right panel width while maintaining aspect ratio
+        # (previews come at that width already, only small images are still enlarged here)
+        scaled_pix = pixmap
+        if pixmap.width() != self.preview_width():
+            scaled_pix = pixmap.scaledToWidth(self.preview_width(), Qt.SmoothTransformation)
+
+        #self.preview_label.setPixmap(scaled_pix)
+        #self.preview_label.setAlignment(Qt.AlignCenter)
+        preview = ClickableLabel()
+        preview.setProperty("element_id", element_id)
+        preview.setPixmap(scaled_pix)
+        preview.setAlignment(Qt.AlignCenter)
+        #self.right_layout.addWidget(preview)
+        self.previews_layout.addWidget(preview)
+        return preview
+
+    def add_text_label(self, element_id, text):
+        preview = ClickableLabel()
+        preview.setProperty("element_id", element_id)
+        preview.setText(text)
+        preview.setWordWrap(True)
+        #self.right_layout.addWidget(preview)
+        preview.setStyleSheet("border: 1px solid gray; padding: 5px; margin-bottom: 5px;")
+        self.previews_layout.addWidget(preview)
+        preview.clicked.connect(lambda: self.set_text_to_points(preview))
+        return preview
+
+    def add_question_entry(self, entry):
+        self.question_data['data'].append(entry)
+        self.question_index[entry['id']] = entry
+        self.save_draft()
+
     def show_text_preview(self, text):
         """Append a new text preview to the right panel."""
         try:
-            preview = ClickableLabel()
-            preview.setProperty("element_id", self.element_counter)
-            preview.setText(text)
-            preview.setWordWrap(True)
-            #self.right_layout.addWidget(preview)
-            preview.setStyleSheet("border: 1px solid gray; padding: 5px; margin-bottom: 5px;")
-            self.previews_layout.addWidget(preview)
-            preview.clicked.connect(lambda: self.set_text_to_points(preview))
-            self.question_data['data'].append({
+            self.add_text_label(self.element_counter, text)
+            used_in = self.question_store.text_used_in(text, self.current_question_id)
+            if used_in:
+                self.submission_label.setText(
+                    f"This text is already in question {', '.join(f'#{question_id}' for question_id in used_in)}")
+            self.add_question_entry({
                 "id": self.element_counter,
                 "value": text,
                 "type": 'question',
@@ -447,76 +988,72 @@ class PDFtoJSONApp(QWidget):
         except Exception as e:
             QMessageBox.warning(self, "Preview Error", f"Failed to show text preview:\n{str(e)}")
 
-    def process_picture(self, element, document, output_dir, doc_filename):
+    def process_picture(self, record):
         try:
-            picture_counter = len([w for w in self.findChildren(QLabel) if "picture" in w.objectName()]) + 1
-            image = element.get_image(document)
-
-            # Encode the image to base64
-            buffered = BytesIO()
-            image.save(buffered, format="PNG")
-            encoded_img = base64.b64encode(buffered.getvalue()).decode('utf-8')
+            picture_counter = self.element_model.next_number('picture')
+            record['number'] = picture_counter
 
             #lement_image_filename = output_dir / f"{doc_filename}-picture-{picture_counter}.png"
             #with element_image_filename.open("wb") as fp:
             #    image.save(fp, "PNG")
-            
-            qimage = ImageQt(image)
-            pixmap = QPixmap.fromImage(qimage)
-            
-            #label = QLabel()
-            picture_label = ClickableLabel()
-            picture_label.setObjectName(f"picture_{picture_counter}")
-            picture_label.setPixmap(pixmap)
-            picture_label.setAlignment(Qt.AlignCenter)
-            picture_label.full_pixmap = pixmap
-            
-            picture_label.clicked.connect(lambda: self.show_image_preview(picture_label, encoded_img))
 
-            self.left_content_layout.addWidget(picture_label)
+            return record
 
         except Exception as e:
             raise Exception(f"Picture processing failed: {str(e)}") from e
 
-    def process_text(self, element):
-        try:
-            text_label = ClickableLabel()
-            text_label.setObjectName("text_preview")
-            
-            # Get text content with fallbacks
-            text = getattr(element, 'text')
-            if text is None or text == '':    
-                # to do: really make sure we are handling a chemical formula (there maby other scenarios where we fall here)
-                text_content = getattr(element, 'orig', getattr(element, 'content', str(element)))
-                empty_text = True
-                text_label.setStyleSheet("border: 2px solid red; padding: 5px; margin-bottom: 5px;")
-                    #getattr(element, 'orig', getattr(element, 'content', str(element))) + 
-                    #'\nNOTE: ESSA FORMULA PROVAVELMENTE NÃO ESTÁ IGUAL A FORMULA DO PDF.\nGERAR UMA IMAGEM DA FORMULA E ANEXAR NO PAINEL')
-            else:
-                text_content = getattr(element, 'text', getattr(element, 'content', str(element)))
-                text_label.setStyleSheet("border: 1px solid gray; padding: 5px; margin-bottom: 5px;")
-
-            text_label.setText(text_content)
-            text_label.setWordWrap(True)
+    def process_formula(self, record):
+        """Image of a formula docling couldn't read, shown right below its (red bordered) text row."""
+        record['number'] = self.element_model.next_number('formula')
+        return record
 
-            text_label.clicked.connect(lambda: self.show_text_preview(text_content))
-            self.left_content_layout.addWidget(text_label)
+    def process_text(self, record):
+        try:
+            # Text content (with fallbacks) comes from extraction.extract_text.
+            # Empty text is painted with a red border by ElementDelegate:
+            #'\nNOTE: ESSA FORMULA PROVAVELMENTE NÃO ESTÁ IGUAL A FORMULA DO PDF.\nGERAR UMA IMAGEM DA FORMULA E ANEXAR NO PAINEL')
+            if record['text'] is None:
+                record['text'] = ''
+            return record
         
         except Exception as e:
             error_msg = f"Text processing failed: {str(e)}"
             print(error_msg)
             QMessageBox.warning(self, "Text Error", error_msg)
 
+    def on_element_clicked(self, index):
+        record = index.data(ElementListModel.RecordRole)
+        if record['kind'] == 'text':
+            self.show_text_preview(record['text'])
+        else:
+            self.show_image_preview(record)
+
+    def load_element_pixmap(self, record, width):
+        """Thumbnail pixmap of an element at the width it is shown in the left panel."""
+        def load():
+            with PROFILER.span("thumbnail_pixmap", trace=False):
+                pixmap = self.image_spill.load_pixmap(record['thumbnail'])
+                if pixmap.width() > width:
+                    pixmap = pixmap.scaledToWidth(width, Qt.SmoothTransformation)
+            return pixmap
+        return self.pixmap_cache.get(('thumb', record['key'], width), load)
+
+    def update_memory_label(self):
+        """Report what the image tiers currently hold."""
+        self.memory_label.setText(
+            f"Images: {self.thumbnail_count} thumbnails ({self.thumbnail_bytes / 1048576:.1f} MB spilled), "
+            f"pixmap cache {self.pixmap_cache.used_bytes / 1048576:.1f}/{self.pixmap_cache.budget_bytes / 1048576:.0f} MB"
+        )
+
     def set_text_to_points(self, element):
         element.setStyleSheet("border: 2px solid green; padding: 5px; margin-bottom: 5px;")
         elem_id = element.property("element_id")
         print("elem_id: ", elem_id)
-        for i, text in enumerate(self.question_data['data']):
-            print("text['id]: ", text['id'])
-            if text['id'] == elem_id:
-                print("ACHOU IGUAL ID")
-                self.question_data['data'][i]['type'] = 'point'
-                print("question_data after clicked: ", self.question_data)
+        entry = self.question_index.get(elem_id)
+        if entry is not None:
+            entry['type'] = 'point'
+            print("question_data after clicked: ", self.question_data)
+            self.save_draft()
 
     #---unused--- to do: maby remove it
     def on_element_click(self, element):
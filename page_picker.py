@@ -0,0 +1,73 @@
+import pypdfium2 as pdfium
+from PySide6.QtCore import Qt, QSize, QTimer
+from PySide6.QtGui import QIcon
+from PySide6.QtWidgets import (
+    QAbstractItemView, QDialog, QDialogButtonBox, QLabel,
+    QListView, QListWidget, QListWidgetItem, QVBoxLayout)
+
+from image_store import pixmap_from_raw
+
+THUMBNAIL_HEIGHT = 160
+THUMBNAILS_PER_TICK = 4  # pages rendered per event loop turn, the dialog stays responsive
+
+
+class PagePickerDialog(QDialog):
+    """
+    Strip of page thumbnails rendered with pypdfium2 (no docling models involved),
+    so the pages to convert can be chosen before the expensive pipeline runs.
+    """
+
+    def __init__(self, file_path, selected_pages=None, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Choose pages to convert")
+        self.setMinimumSize(800, 400)
+        self.pdf = pdfium.PdfDocument(file_path)
+        self.next_page = 0
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel("Select the pages to convert (Ctrl/Shift + click for several):"))
+        self.page_list = QListWidget()
+        self.page_list.setViewMode(QListView.IconMode)
+        self.page_list.setFlow(QListView.LeftToRight)
+        self.page_list.setWrapping(True)
+        self.page_list.setResizeMode(QListView.Adjust)
+        self.page_list.setIconSize(QSize(THUMBNAIL_HEIGHT, THUMBNAIL_HEIGHT))
+        self.page_list.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        layout.addWidget(self.page_list)
+
+        for page_no in range(1, len(self.pdf) + 1):
+            item = QListWidgetItem(str(page_no))
+            item.setData(Qt.UserRole, page_no)
+            self.page_list.addItem(item)
+            if selected_pages and page_no in selected_pages:
+                item.setSelected(True)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.render_next_thumbnails)
+        self.timer.start(0)
+
+    def render_next_thumbnails(self):
+        for _ in range(THUMBNAILS_PER_TICK):
+            if self.next_page >= len(self.pdf):
+                self.timer.stop()
+                return
+            page = self.pdf[self.next_page]
+            scale = THUMBNAIL_HEIGHT / page.get_height()
+            image = page.render(scale=scale).to_pil()
+            page.close()
+            pixmap = pixmap_from_raw(image.mode, image.size, image.tobytes())
+            self.page_list.item(self.next_page).setIcon(QIcon(pixmap))
+            self.next_page += 1
+
+    def selected_pages(self):
+        return sorted(item.data(Qt.UserRole) for item in self.page_list.selectedItems())
+
+    def done(self, result):
+        self.timer.stop()
+        self.pdf.close()
+        super().done(result)
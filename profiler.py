@@ -0,0 +1,179 @@
+"""
+Lightweight instrumentation shared by the GUI and the conversion worker: named spans, counters
+and memory snapshots (RSS, plus Python allocations while tracemalloc tracing is on).
+Spans export to the Chrome trace format (chrome://tracing or https://ui.perfetto.dev).
+
+    with PROFILER.span("convert", pages="1-2"):
+        ...
+    PROFILER.count("bytes.thumbnail", len(data))
+
+Every span updates running per-name totals (stage_summary). Only spans recorded with trace=True
+(the default) are also kept, up to MAX_SPANS, for the Chrome trace; per-row UI spans pass
+trace=False so they don't push the conversion stages out.
+"""
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, deque
+from contextlib import contextmanager
+from datetime import timezone
+from pathlib import Path
+
+MAX_SPANS = 100_000  # oldest spans are dropped past this, a long session doesn't grow without bound
+TRACEMALLOC = os.environ.get("PDF2JSON_TRACEMALLOC", "").lower() in ("1", "true", "yes")
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_rss_bytes():
+    """Peak resident set size of this process, None where the platform doesn't tell."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def current_rss_bytes():
+    """Current resident set size (Linux), the peak elsewhere."""
+    try:
+        with open("/proc/self/statm") as fp:
+            return int(fp.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return peak_rss_bytes()
+
+
+class Profiler:
+    def __init__(self, max_spans=MAX_SPANS):
+        self._lock = threading.Lock()
+        self.max_spans = max_spans
+        self.reset()
+        if TRACEMALLOC:
+            self.start_tracing()
+
+    def reset(self):
+        with self._lock:
+            self.origin = time.perf_counter()
+            self.origin_wall = time.time()
+            self.spans = deque(maxlen=self.max_spans)  # (name, start, seconds, thread id, thread name, args)
+            self.stages = {}  # name -> [count, total seconds, max seconds]
+            self.counters = Counter()
+            self.snapshots = []  # {'label', 'time', 'rss', 'traced', 'traced_peak'}
+
+    @contextmanager
+    def span(self, name, trace=True, **args):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_span(name, start, time.perf_counter() - start, args, trace)
+
+    def add_span(self, name, start, seconds, args=None, trace=True):
+        """Record a finished span; start is a time.perf_counter() value. trace=False only adds it to the totals."""
+        thread = threading.current_thread() if trace else None
+        with self._lock:
+            stage = self.stages.get(name)
+            if stage is None:
+                self.stages[name] = [1, seconds, seconds]
+            else:
+                stage[0] += 1
+                stage[1] += seconds
+                if seconds > stage[2]:
+                    stage[2] = seconds
+            if trace:
+                self.spans.append((name, start, seconds, thread.ident, thread.name, args or {}))
+
+    def add_docling_timings(self, timings, prefix="docling."):
+        """
+        Spans from a ConversionResult.timings dict (docling's per-stage profiling: page parse,
+        layout, OCR, table structure...), recorded when profile_pipeline_timings is enabled.
+        """
+        for stage, item in timings.items():
+            for start_timestamp, seconds in zip(item.start_timestamps, item.times):
+                if start_timestamp.tzinfo is None:
+                    # docling records datetime.utcnow(), naive timestamps are UTC and not local time
+                    start_timestamp = start_timestamp.replace(tzinfo=timezone.utc)
+                start = self.origin + start_timestamp.timestamp() - self.origin_wall
+                self.add_span(f"{prefix}{stage}", start, seconds, {'scope': item.scope.value})
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def counts(self):
+        with self._lock:
+            return dict(self.counters)
+
+    def is_tracing(self):
+        return tracemalloc.is_tracing()
+
+    def start_tracing(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def stop_tracing(self):
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def snapshot(self, label):
+        """Memory at this point: RSS and, while tracing, Python allocations (current and peak)."""
+        traced, traced_peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (None, None)
+        snapshot = {'label': label, 'time': time.perf_counter(), 'rss': current_rss_bytes(),
+                    'traced': traced, 'traced_peak': traced_peak}
+        with self._lock:
+            self.snapshots.append(snapshot)
+        return snapshot
+
+    def stage_summary(self):
+        """Per span name: calls, total, mean and max, the most expensive stages first."""
+        with self._lock:
+            stages = {name: tuple(stage) for name, stage in self.stages.items()}
+        summary = {
+            name: {
+                'count': count,
+                'total_s': total,
+                'mean_ms': total / count * 1000,
+                'max_ms': longest * 1000,
+            }
+            for name, (count, total, longest) in stages.items()
+        }
+        return dict(sorted(summary.items(), key=lambda item: item[1]['total_s'], reverse=True))
+
+    def chrome_trace(self):
+        """The recorded spans, counters and snapshots as a Chrome trace event dict."""
+        pid = os.getpid()
+        micros = lambda t: (t - self.origin) * 1_000_000
+        events = []
+        thread_names = {}
+        with self._lock:
+            for name, start, seconds, tid, thread_name, args in self.spans:
+                thread_names[tid] = thread_name
+                events.append({'name': name, 'ph': "X", 'ts': micros(start), 'dur': seconds * 1_000_000,
+                               'pid': pid, 'tid': tid, 'args': args})
+            for snapshot in self.snapshots:
+                values = {'rss_mb': (snapshot['rss'] or 0) / 1048576}
+                if snapshot['traced'] is not None:
+                    values['traced_mb'] = snapshot['traced'] / 1048576
+                events.append({'name': "memory", 'ph': "C", 'ts': micros(snapshot['time']), 'pid': pid,
+                               'args': values})
+            counters = dict(self.counters)
+        for tid, thread_name in thread_names.items():
+            events.append({'name': "thread_name", 'ph': "M", 'pid': pid, 'tid': tid, 'args': {'name': thread_name}})
+        return {'traceEvents': events, 'displayTimeUnit': "ms", 'otherData': {'counters': counters}}
+
+    def export_chrome_trace(self, path):
+        path = Path(path)
+        tmp_file = path.with_suffix(path.suffix + ".tmp")
+        tmp_file.write_text(json.dumps(self.chrome_trace()), encoding="utf-8")
+        os.replace(tmp_file, path)
+        return path
+
+
+# the process wide profiler the app, the worker and the list delegate record into
+PROFILER = Profiler()
@@ -0,0 +1,120 @@
+import time
+
+from PySide6.QtCore import Qt, QTimer
+from PySide6.QtWidgets import (
+    QCheckBox, QFileDialog, QHBoxLayout, QLabel, QMessageBox, QPushButton,
+    QToolButton, QTreeWidget, QTreeWidgetItem, QVBoxLayout, QWidget)
+
+REFRESH_MS = 1000  # refresh interval while the panel is open
+
+
+class ProfilerPanel(QWidget):
+    """Collapsible view of a profiler.Profiler: per-stage timings, counters and memory snapshots."""
+
+    def __init__(self, profiler, parent=None):
+        super().__init__(parent)
+        self.profiler = profiler
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.toggle_button = QToolButton()
+        self.toggle_button.setText("Profiler")
+        self.toggle_button.setCheckable(True)
+        self.toggle_button.setToolButtonStyle(Qt.ToolButtonTextBesideIcon)
+        self.toggle_button.setArrowType(Qt.RightArrow)
+        self.toggle_button.toggled.connect(self.set_expanded)
+        layout.addWidget(self.toggle_button)
+
+        self.body = QWidget()
+        body_layout = QVBoxLayout(self.body)
+        body_layout.setContentsMargins(0, 0, 0, 0)
+        self.stage_tree = QTreeWidget()
+        self.stage_tree.setHeaderLabels(["Stage", "Calls", "Total s", "Mean ms", "Max ms"])
+        self.stage_tree.setRootIsDecorated(False)
+        self.stage_tree.setMinimumHeight(160)
+        body_layout.addWidget(self.stage_tree)
+        self.counters_label = QLabel()
+        self.counters_label.setWordWrap(True)
+        body_layout.addWidget(self.counters_label)
+        self.memory_label = QLabel()
+        self.memory_label.setWordWrap(True)
+        body_layout.addWidget(self.memory_label)
+
+        buttons_layout = QHBoxLayout()
+        self.tracing_checkbox = QCheckBox("Trace Python allocations")
+        self.tracing_checkbox.setToolTip("tracemalloc, slows the app down while enabled")
+        self.tracing_checkbox.toggled.connect(self.set_tracing)
+        buttons_layout.addWidget(self.tracing_checkbox)
+        buttons_layout.addStretch(1)
+        snapshot_button = QPushButton("Snapshot")
+        snapshot_button.clicked.connect(lambda: (self.profiler.snapshot("manual"), self.refresh()))
+        buttons_layout.addWidget(snapshot_button)
+        reset_button = QPushButton("Reset")
+        reset_button.clicked.connect(self.reset)
+        buttons_layout.addWidget(reset_button)
+        export_button = QPushButton("Export trace...")
+        export_button.clicked.connect(self.export_trace)
+        buttons_layout.addWidget(export_button)
+        body_layout.addLayout(buttons_layout)
+        layout.addWidget(self.body)
+        self.body.hide()
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(REFRESH_MS)
+        self.timer.timeout.connect(self.refresh)
+
+    def set_expanded(self, expanded):
+        self.toggle_button.setArrowType(Qt.DownArrow if expanded else Qt.RightArrow)
+        self.body.setVisible(expanded)
+        if expanded:
+            self.tracing_checkbox.setChecked(self.profiler.is_tracing())
+            self.refresh()
+            self.timer.start()
+        else:
+            self.timer.stop()
+
+    def set_tracing(self, enabled):
+        if enabled:
+            self.profiler.start_tracing()
+        else:
+            self.profiler.stop_tracing()
+
+    def refresh(self):
+        if not self.body.isVisible():
+            return
+        self.stage_tree.clear()
+        for name, stats in self.profiler.stage_summary().items():
+            item = QTreeWidgetItem([name, str(stats['count']), f"{stats['total_s']:.3f}",
+                                    f"{stats['mean_ms']:.2f}", f"{stats['max_ms']:.2f}"])
+            for column in range(1, 5):
+                item.setTextAlignment(column, Qt.AlignRight)
+            self.stage_tree.addTopLevelItem(item)
+        self.stage_tree.resizeColumnToContents(0)
+
+        counters = []
+        for name, value in sorted(self.profiler.counts().items()):
+            counters.append(f"{name} {value / 1048576:.1f} MB" if name.startswith("bytes.") else f"{name} {value}")
+        self.counters_label.setText(f"Counters: {', '.join(counters) or 'none yet'}")
+
+        snapshots = []
+        for snapshot in self.profiler.snapshots[-3:]:
+            text = f"{snapshot['label']}: RSS {(snapshot['rss'] or 0) / 1048576:.0f} MB"
+            if snapshot['traced'] is not None:
+                text += (f", Python {snapshot['traced'] / 1048576:.1f} MB"
+                         f" (peak {snapshot['traced_peak'] / 1048576:.1f} MB)")
+            snapshots.append(text)
+        self.memory_label.setText(f"Memory: {'; '.join(snapshots) or 'no snapshots yet'}")
+
+    def reset(self):
+        self.profiler.reset()
+        self.refresh()
+
+    def export_trace(self):
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "Export Chrome trace", f"trace-{time.strftime('%Y%m%d-%H%M%S')}.json", "JSON Files (*.json)")
+        if not file_path:
+            return
+        try:
+            self.profiler.export_chrome_trace(file_path)
+        except OSError as e:
+            QMessageBox.warning(self, "Export Error", f"Failed to export the trace:\n{e}")
@@ -0,0 +1,86 @@
+from PySide6.QtCore import Qt
+from PySide6.QtWidgets import (
+    QDialog, QDialogButtonBox, QHBoxLayout, QLabel, QListWidget,
+    QListWidgetItem, QPushButton, QTextEdit, QVBoxLayout)
+
+PREVIEW_CHARS = 80
+
+
+class QuestionReviewDialog(QDialog):
+    """
+    Questions found by segmentation.segment, to review before they become /questions payloads.
+    Unchecked questions are left out of "Confirm checked"; "Load in panel" opens one for editing.
+    action is 'load' or 'confirm' once accepted.
+    """
+
+    def __init__(self, questions, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Review questions")
+        self.setMinimumSize(900, 500)
+        self.questions = questions
+        self.action = None
+
+        layout = QVBoxLayout(self)
+        points = sum(1 for question in questions for entry in question['entries'] if entry['type'] == 'point')
+        layout.addWidget(QLabel(f"{len(questions)} questions found, {points} alternatives."))
+
+        panes = QHBoxLayout()
+        self.question_list = QListWidget()
+        for question in questions:
+            item = QListWidgetItem(self.summary(question))
+            item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
+            item.setCheckState(Qt.Checked)
+            self.question_list.addItem(item)
+        self.question_list.currentRowChanged.connect(self.show_question)
+        panes.addWidget(self.question_list, 1)
+        self.details = QTextEdit()
+        self.details.setReadOnly(True)
+        panes.addWidget(self.details, 1)
+        layout.addLayout(panes)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Cancel)
+        load_button = QPushButton("Load in panel")
+        load_button.clicked.connect(lambda: self.finish('load'))
+        buttons.addButton(load_button, QDialogButtonBox.ActionRole)
+        confirm_button = QPushButton("Confirm checked")
+        confirm_button.clicked.connect(lambda: self.finish('confirm'))
+        buttons.addButton(confirm_button, QDialogButtonBox.ActionRole)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+
+        if questions:
+            self.question_list.setCurrentRow(0)
+
+    def summary(self, question):
+        statement = " ".join(entry['text'] for entry in question['entries'] if entry['type'] == 'question')
+        if len(statement) > PREVIEW_CHARS:
+            statement = statement[:PREVIEW_CHARS] + "..."
+        points = sum(1 for entry in question['entries'] if entry['type'] == 'point')
+        images = sum(1 for entry in question['entries'] if entry['type'] == 'image')
+        return f"{question['number']} (p. {question['page']}): {statement} [{points} alt., {images} img.]"
+
+    def show_question(self, row):
+        if row < 0:
+            self.details.clear()
+            return
+        lines = []
+        for entry in self.questions[row]['entries']:
+            if entry['type'] == 'image':
+                lines.append("[image]")
+            elif entry['type'] == 'point':
+                lines.append(f"    {entry['text']}")
+            else:
+                lines.append(entry['text'])
+        self.details.setPlainText("\n\n".join(lines))
+
+    def finish(self, action):
+        self.action = action
+        self.accept()
+
+    def current_question(self):
+        row = self.question_list.currentRow()
+        return None if row < 0 else self.questions[row]
+
+    def checked_questions(self):
+        return [question for row, question in enumerate(self.questions)
+                if self.question_list.item(row).checkState() == Qt.Checked]
@@ -0,0 +1,170 @@
+"""
+Qt-free grouping of the element record stream (see extraction.py) into questions.
+
+Questions start at a "QUESTÃO 12" style header or, in exams without headers, at a line numbered
+"12." / "12)" / "12 -" that continues the numbering. Inside a question, lines starting with the
+next alternative letter ("A)", "(B)", "c.") are its alternatives; text that follows an alternative
+on the same page and in its column (bounding boxes) continues it, pictures and tables are attached
+as images, and so are formula crops (formula_crops.py), which replace their unreadable text item.
+Page headers / footers are skipped, questions may run across pages.
+
+A question is a dict:
+    {'number': 12, 'page': 3, 'entries': [entry, ...]}
+with entries in reading order:
+    {'kind': 'text', 'type': 'question' | 'point', 'text': str, 'keys': [record keys]}
+    {'kind': 'image', 'type': 'image', 'key': record key}
+'type' is what the /questions payload uses; alternatives are 'point' entries.
+"""
+import re
+
+QUESTION_HEADER = re.compile(r"^\s*(?:QUEST(?:[ÃA]O|ION)|Quest(?:[ãa]o|ion))\s*(?:N[º°o.]\s*)?(\d{1,3})\b[\s.:)\-–—]*",
+                             re.IGNORECASE)
+# whitespace after the separator: "3.5 mol" and "1-2 dias" are not question 3 / 1, "2. 20% de 50" is question 2
+QUESTION_NUMBER = re.compile(r"^\s*(\d{1,3})\s*[.)\-–—]\s+(?=\S)")
+ALTERNATIVE = re.compile(r"^\s*\(?([A-Ea-e])\s*[).\-–—]\s*")
+INLINE_ALTERNATIVE = re.compile(r"(?:^|\s)\(?([A-E])\s*\)\s*")
+SKIPPED_LABELS = {'page_header', 'page_footer'}
+LETTERS = "ABCDE"
+# an item continues the alternative before it when it is on the same line to its right, or below
+# it in the same column: starting at most COLUMN_TOLERANCE points further left, at most
+# MAX_LINE_GAP of the alternative's height below it
+COLUMN_TOLERANCE = 20
+MAX_LINE_GAP = 1.5
+
+
+def question_header(text):
+    """(number, rest of the text) when text opens a question with a header, else None."""
+    match = QUESTION_HEADER.match(text)
+    if match is None:
+        return None
+    return int(match.group(1)), text[match.end():].strip()
+
+
+def numbered_line(text):
+    match = QUESTION_NUMBER.match(text)
+    if match is None:
+        return None
+    return int(match.group(1)), text[match.end():].strip()
+
+
+def alternative_letter(text):
+    match = ALTERNATIVE.match(text)
+    return None if match is None else match.group(1).upper()
+
+
+def split_inline_alternatives(text, first_letter="A"):
+    """
+    "A) 1 B) 2 C) 3" in one item -> ["A) 1", "B) 2", "C) 3"] when the letters run in order from
+    first_letter; [] when the text isn't such a row.
+    """
+    matches = list(INLINE_ALTERNATIVE.finditer(text))
+    expected = LETTERS[LETTERS.index(first_letter):]
+    if len(matches) < 2 or [m.group(1) for m in matches] != list(expected[:len(matches)]):
+        return []
+    if text[:matches[0].start()].strip():
+        return []
+    bounds = [m.start() for m in matches] + [len(text)]
+    return [text[start:end].strip() for start, end in zip(bounds, bounds[1:])]
+
+
+def continues(previous, record):
+    """
+    Whether record continues previous: to its right on the same line, or the next line of the
+    same column (same page, starting no further left, right below it).
+    """
+    if previous is None or previous.get('bbox') is None or record.get('bbox') is None:
+        return False
+    if previous['page'] != record['page']:
+        return False
+    left, top, right, bottom = previous['bbox']
+    record_left, record_top, _record_right, record_bottom = record['bbox']
+    if record_top < bottom and record_bottom > top:
+        return record_left >= right - COLUMN_TOLERANCE
+    height = max(bottom - top, 1)
+    return record_left >= left - COLUMN_TOLERANCE and 0 <= record_top - bottom <= MAX_LINE_GAP * height
+
+
+class Segmenter:
+    """Feed records in document order with add(); finish() returns the questions."""
+
+    def __init__(self, headers_only=False):
+        self.headers_only = headers_only  # numbered lines don't start questions (the exam has headers)
+        self.questions = []
+        self.current = None
+        self.last_alternative = None  # record the last alternative entry came from
+
+    def start_question(self, number, record, rest):
+        self.current = {'number': number, 'page': record['page'], 'entries': []}
+        self.questions.append(self.current)
+        self.last_alternative = None
+        if rest:
+            self.add_text(rest, 'question', record)
+
+    def add_text(self, text, entry_type, record):
+        self.current['entries'].append({'kind': 'text', 'type': entry_type, 'text': text, 'keys': [record['key']]})
+
+    def next_letter(self):
+        count = sum(1 for entry in self.current['entries'] if entry['type'] == 'point')
+        return LETTERS[count] if count < len(LETTERS) else None
+
+    def add(self, record):
+        if record.get('label') in SKIPPED_LABELS or record.get('has_crop'):
+            return
+        if record['kind'] != 'text':
+            if self.current is not None:
+                self.current['entries'].append({'kind': 'image', 'type': 'image', 'key': record['key']})
+                self.last_alternative = None
+            return
+
+        text = (record['text'] or '').strip()
+        if not text:
+            return
+        header = question_header(text)
+        if header is not None:
+            self.start_question(header[0], record, header[1])
+            return
+        if not self.headers_only:
+            numbered = numbered_line(text)
+            expected = None if self.current is None else self.current['number'] + 1
+            # a numbered line is a new question only when it continues the numbering
+            if numbered is not None and (self.current is None or numbered[0] == expected):
+                self.start_question(numbered[0], record, numbered[1])
+                return
+        if self.current is None:
+            return  # cover page, instructions...
+
+        letter = self.next_letter()
+        if letter is not None:
+            row = split_inline_alternatives(text, letter)
+            if row:
+                for alternative in row:
+                    self.add_text(alternative, 'point', record)
+                self.last_alternative = record
+                return
+            if alternative_letter(text) == letter:
+                self.add_text(text, 'point', record)
+                self.last_alternative = record
+                return
+        last_entry = self.current['entries'][-1] if self.current['entries'] else None
+        if (self.last_alternative is not None and last_entry is not None and last_entry['type'] == 'point'
+                and continues(self.last_alternative, record)):
+            # wrapped alternative, or "A)" and its text as separate items
+            last_entry['text'] = f"{last_entry['text']} {text}"
+            last_entry['keys'].append(record['key'])
+            self.last_alternative = record
+            return
+        self.add_text(text, 'question', record)
+        self.last_alternative = None
+
+    def finish(self):
+        return [question for question in self.questions if question['entries']]
+
+
+def segment(records):
+    """Questions (see the module docstring) found in element records in document order."""
+    records = list(records)
+    headers = sum(1 for record in records if record['kind'] == 'text' and question_header(record['text'] or ''))
+    segmenter = Segmenter(headers_only=headers >= 2)
+    for record in records:
+        segmenter.add(record)
+    return segmenter.finish()
@@ -0,0 +1,78 @@
+from PySide6.QtWidgets import (
+    QCheckBox, QComboBox, QDialog, QDialogButtonBox,
+    QFormLayout, QSpinBox, QVBoxLayout)
+
+from app_settings import DEVICES
+
+
+class SettingsDialog(QDialog):
+    """Edit the accelerator / thread / batch settings (see app_settings.py)."""
+
+    def __init__(self, settings, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Pipeline settings")
+        self.settings = dict(settings)
+
+        layout = QVBoxLayout(self)
+        form = QFormLayout()
+        self.device_combo = QComboBox()
+        self.device_combo.addItems(DEVICES)
+        self.device_combo.setCurrentText(settings['device'])
+        form.addRow("Accelerator device:", self.device_combo)
+
+        self.threads_spin = QSpinBox()
+        self.threads_spin.setRange(1, 256)
+        self.threads_spin.setValue(settings['num_threads'])
+        form.addRow("Torch / OCR threads:", self.threads_spin)
+
+        self.page_batch_spin = QSpinBox()
+        self.page_batch_spin.setRange(0, 1000)
+        self.page_batch_spin.setSpecialValueText("whole document")
+        self.page_batch_spin.setValue(settings['page_batch_size'])
+        form.addRow("Pages per conversion step:", self.page_batch_spin)
+
+        self.docling_batch_spin = QSpinBox()
+        self.docling_batch_spin.setRange(1, 256)
+        self.docling_batch_spin.setValue(settings['docling_page_batch_size'])
+        form.addRow("Docling page batch size:", self.docling_batch_spin)
+
+        self.auto_tune_checkbox = QCheckBox("Benchmark and pick the fastest device/threads at startup")
+        self.auto_tune_checkbox.setChecked(settings['auto_tune'])
+        form.addRow(self.auto_tune_checkbox)
+
+        self.profile_pipeline_checkbox = QCheckBox("Record docling stage timings for the profiler panel")
+        self.profile_pipeline_checkbox.setChecked(settings['profile_pipeline'])
+        form.addRow(self.profile_pipeline_checkbox)
+
+        self.formula_crops_checkbox = QCheckBox("Offer images of formulas without readable text")
+        self.formula_crops_checkbox.setChecked(settings['formula_crops'])
+        form.addRow(self.formula_crops_checkbox)
+
+        self.export_checkbox = QCheckBox("Export confirmed questions as JSONL to scratch/export")
+        self.export_checkbox.setChecked(settings['export_jsonl'])
+        form.addRow(self.export_checkbox)
+
+        self.export_elements_checkbox = QCheckBox("Also export every converted element (encodes all images as PNG)")
+        self.export_elements_checkbox.setChecked(settings['export_elements'])
+        form.addRow(self.export_elements_checkbox)
+        layout.addLayout(form)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+
+    def result_settings(self):
+        settings = dict(self.settings)
+        settings['device'] = self.device_combo.currentText()
+        settings['num_threads'] = self.threads_spin.value()
+        settings['page_batch_size'] = self.page_batch_spin.value()
+        settings['docling_page_batch_size'] = self.docling_batch_spin.value()
+        if self.auto_tune_checkbox.isChecked() and not settings['auto_tune']:
+            settings['tuned_for'] = None  # tune again on next start
+        settings['auto_tune'] = self.auto_tune_checkbox.isChecked()
+        settings['profile_pipeline'] = self.profile_pipeline_checkbox.isChecked()
+        settings['formula_crops'] = self.formula_crops_checkbox.isChecked()
+        settings['export_jsonl'] = self.export_checkbox.isChecked()
+        settings['export_elements'] = self.export_elements_checkbox.isChecked()
+        return settings
@@ -0,0 +1,250 @@
+"""
+Local SQLite store of drafted and submitted questions.
+
+A question is the question_data dict the right panel builds ({'data': [...], 'filter': {...}}),
+kept as one row of questions (filter fields, status, hashes) plus one row of items per entry.
+Image PNGs live once per content hash in images. status goes
+    draft -> ready (confirmed) -> sending (in the submission outbox) -> synced | rejected
+and content_hash / synced_hash tell whether a confirmed question changed since the backend got it,
+so a sync only sends unsent or changed questions.
+"""
+import hashlib
+import json
+import sqlite3
+import time
+from pathlib import Path
+
+STORE_FILE = Path("scratch") / "questions.db"
+SYNC_BATCH_SIZE = 20  # questions handed to the submission queue per sync pass
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS questions (
+    id INTEGER PRIMARY KEY,
+    status TEXT NOT NULL DEFAULT 'draft',
+    materia TEXT NOT NULL DEFAULT '[]',
+    assunto TEXT NOT NULL DEFAULT '',
+    sub_assunto TEXT NOT NULL DEFAULT '',
+    faculdade TEXT NOT NULL DEFAULT '',
+    ano TEXT NOT NULL DEFAULT '',
+    content_hash TEXT,
+    sending_hash TEXT,
+    synced_hash TEXT,
+    submission_id TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    synced_at REAL
+);
+CREATE INDEX IF NOT EXISTS questions_status ON questions (status);
+CREATE INDEX IF NOT EXISTS questions_content_hash ON questions (content_hash);
+CREATE INDEX IF NOT EXISTS questions_submission_id ON questions (submission_id);
+CREATE TABLE IF NOT EXISTS items (
+    question_id INTEGER NOT NULL REFERENCES questions (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    value TEXT,
+    text_hash TEXT,
+    image_sha256 TEXT,
+    PRIMARY KEY (question_id, position)
+);
+CREATE INDEX IF NOT EXISTS items_text_hash ON items (text_hash);
+CREATE INDEX IF NOT EXISTS items_image_sha256 ON items (image_sha256);
+CREATE TABLE IF NOT EXISTS images (
+    sha256 TEXT PRIMARY KEY,
+    png BLOB NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+
+def text_hash(text):
+    # whitespace differences don't make a different question
+    return hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()
+
+
+def content_hash(question_data):
+    """Hash of what the backend receives, ids (positions in the panel) left out."""
+    canonical = {
+        'data': [{k: v for k, v in entry.items() if k != 'id'} for entry in question_data['data']],
+        'filter': question_data['filter'],
+    }
+    return hashlib.sha256(json.dumps(canonical, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+class QuestionStore:
+    """Used from the GUI thread only (one sqlite3 connection)."""
+
+    def __init__(self, path=STORE_FILE):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(self.path)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode = WAL")
+        self.db.execute("PRAGMA foreign_keys = ON")
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def save(self, question_id, question_data, images=None):
+        """
+        Insert (question_id None) or update a question with its entries and the PNGs of its
+        image entries ({sha256: bytes}). Returns the question id. An edited question is a draft
+        again until it is confirmed; saving it unchanged keeps its status.
+        """
+        now = time.time()
+        question_filter = question_data['filter']
+        fields = {
+            'materia': json.dumps(question_filter.get('materia') or []),
+            'assunto': _single(question_filter.get('assunto')),
+            'sub_assunto': _single(question_filter.get('subAssunto')),
+            'faculdade': question_filter.get('faculdade') or '',
+            'ano': question_filter.get('ano') or '',
+            'content_hash': content_hash(question_data),
+            'updated_at': now,
+        }
+        with self.db:
+            if question_id is None:
+                cursor = self.db.execute(
+                    f"INSERT INTO questions ({', '.join(fields)}, created_at) VALUES ({', '.join('?' * len(fields))}, ?)",
+                    (*fields.values(), now))
+                question_id = cursor.lastrowid
+            else:
+                self.db.execute("UPDATE questions SET status = 'draft' WHERE id = ? AND content_hash IS NOT ?",
+                                (question_id, fields['content_hash']))
+                self.db.execute(f"UPDATE questions SET {', '.join(f'{k} = ?' for k in fields)} WHERE id = ?",
+                                (*fields.values(), question_id))
+                self.db.execute("DELETE FROM items WHERE question_id = ?", (question_id,))
+            self.db.executemany(
+                "INSERT INTO items (question_id, position, type, value, text_hash, image_sha256) VALUES (?, ?, ?, ?, ?, ?)",
+                [(question_id, position, entry['type'], entry.get('value'),
+                  text_hash(entry['value']) if entry.get('value') is not None else None, entry.get('sha256'))
+                 for position, entry in enumerate(question_data['data'])])
+            if images:
+                self.db.executemany("INSERT OR IGNORE INTO images (sha256, png, created_at) VALUES (?, ?, ?)",
+                                    [(digest, png, now) for digest, png in images.items()])
+        return question_id
+
+    def discard_draft(self, question_id):
+        """Delete a draft the backend never saw; confirmed or sent questions stay."""
+        with self.db:
+            self.db.execute("DELETE FROM questions WHERE id = ? AND status = 'draft' AND submission_id IS NULL",
+                            (question_id,))
+            self._drop_orphan_images()
+
+    def _drop_orphan_images(self):
+        self.db.execute("DELETE FROM images WHERE sha256 NOT IN (SELECT image_sha256 FROM items "
+                        "WHERE image_sha256 IS NOT NULL)")
+
+    def load(self, question_id):
+        """(question_data, {sha256: png}) of a stored question, None if it doesn't exist."""
+        row = self.db.execute("SELECT * FROM questions WHERE id = ?", (question_id,)).fetchone()
+        if row is None:
+            return None
+        data = []
+        images = {}
+        for item in self.db.execute("SELECT * FROM items WHERE question_id = ? ORDER BY position", (question_id,)):
+            entry = {'id': item['position'], 'type': item['type']}
+            if item['image_sha256'] is not None:
+                entry['sha256'] = item['image_sha256']
+                images[item['image_sha256']] = self.image(item['image_sha256'])
+            else:
+                entry['value'] = item['value']
+            data.append(entry)
+        question_filter = {
+            'materia': json.loads(row['materia']),
+            'assunto': [row['assunto']],
+            'subAssunto': [row['sub_assunto']],
+            'faculdade': row['faculdade'],
+            'ano': row['ano'],
+        }
+        return {'data': data, 'filter': question_filter}, images
+
+    def image(self, digest):
+        row = self.db.execute("SELECT png FROM images WHERE sha256 = ?", (digest,)).fetchone()
+        return None if row is None else row['png']
+
+    def latest_draft(self):
+        row = self.db.execute("SELECT id FROM questions WHERE status = 'draft' "
+                              "ORDER BY updated_at DESC LIMIT 1").fetchone()
+        return None if row is None else row['id']
+
+    def duplicate_of(self, question_id, question_data):
+        """Id of another confirmed question with exactly this content, else None."""
+        row = self.db.execute(
+            "SELECT id FROM questions WHERE content_hash = ? AND id IS NOT ? "
+            "AND status IN ('ready', 'sending', 'synced') LIMIT 1",
+            (content_hash(question_data), question_id)).fetchone()
+        return None if row is None else row['id']
+
+    def text_used_in(self, text, exclude_question_id=None):
+        """Ids of confirmed questions that already contain this text."""
+        rows = self.db.execute(
+            "SELECT DISTINCT questions.id FROM items JOIN questions ON questions.id = items.question_id "
+            "WHERE items.text_hash = ? AND questions.id IS NOT ? AND questions.status IN ('ready', 'sending', 'synced')",
+            (text_hash(text), exclude_question_id))
+        return [row['id'] for row in rows]
+
+    def confirm(self, question_id):
+        """
+        Mark a question ready to sync. Returns False (and marks it synced again) when the backend
+        already has exactly this content.
+        """
+        with self.db:
+            row = self.db.execute("SELECT content_hash, synced_hash FROM questions WHERE id = ?",
+                                  (question_id,)).fetchone()
+            unchanged = row['synced_hash'] is not None and row['synced_hash'] == row['content_hash']
+            self.db.execute("UPDATE questions SET status = ? WHERE id = ?",
+                            ('synced' if unchanged else 'ready', question_id))
+        return not unchanged
+
+    def unsynced(self, limit=SYNC_BATCH_SIZE):
+        """Ids of confirmed questions the backend doesn't have in their current version."""
+        rows = self.db.execute(
+            "SELECT id FROM questions WHERE status = 'ready' "
+            "AND (synced_hash IS NULL OR synced_hash != content_hash) ORDER BY updated_at LIMIT ?", (limit,))
+        return [row['id'] for row in rows]
+
+    def mark_sending(self, question_id, submission_id):
+        with self.db:
+            # the version in the outbox; the question may be edited again before it is sent
+            self.db.execute("UPDATE questions SET status = 'sending', submission_id = ?, sending_hash = content_hash "
+                            "WHERE id = ?", (submission_id, question_id))
+
+    def mark_sent(self, submission_id):
+        """The backend accepted a submission. Returns the question id, None for submissions not from the store."""
+        with self.db:
+            row = self.db.execute("SELECT id FROM questions WHERE submission_id = ?", (submission_id,)).fetchone()
+            if row is None:
+                return None
+            self.db.execute("UPDATE questions SET synced_hash = sending_hash, synced_at = ? WHERE id = ?",
+                            (time.time(), row['id']))
+            self.db.execute("UPDATE questions SET status = 'synced' WHERE id = ? AND status = 'sending'", (row['id'],))
+        return row['id']
+
+    def mark_rejected(self, submission_id):
+        with self.db:
+            self.db.execute("UPDATE questions SET status = 'rejected' WHERE submission_id = ? AND status = 'sending'",
+                            (submission_id,))
+
+    def reconcile(self, outbox_dir, rejected_dir):
+        """
+        After a restart: questions left 'sending' whose outbox file is gone were sent (or rejected)
+        while the app was closing; the others are replayed from the outbox. This relies on
+        SubmissionQueue.submit writing the outbox file before mark_sending is called.
+        """
+        rows = self.db.execute("SELECT submission_id FROM questions WHERE status = 'sending'").fetchall()
+        for row in rows:
+            name = f"{row['submission_id']}.json"
+            if (Path(outbox_dir) / name).exists():
+                continue
+            if (Path(rejected_dir) / name).exists():
+                self.mark_rejected(row['submission_id'])
+            else:
+                self.mark_sent(row['submission_id'])
+
+
+def _single(value):
+    """assunto / subAssunto are sent as one element lists."""
+    if isinstance(value, list):
+        return value[0] if value else ''
+    return value or ''
@@ -0,0 +1,236 @@
+"""
+Background submission of questions to the backend.
+
+Every submission is written to an outbox directory by submit() itself, before it is queued, and
+only removed once the backend accepted it, so nothing is lost if the backend is down or the app
+is closed with submissions still waiting. The background thread only sends.
+
+Image entries of question_data reference their PNG by "sha256"; the bytes are kept in
+outbox/blobs and sent according to IMAGE_TRANSPORT:
+  json       base64 "value" inlined in the question JSON (what the backend always accepted)
+  multipart  one multipart/form-data request, the JSON in the "question" part and one part per image
+  hash       each image is PUT to IMAGES_URL/<sha256> unless the backend already has it, then the JSON
+"""
+import base64
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+from PySide6.QtCore import QObject, Signal
+
+_log = logging.getLogger(__name__)
+
+url = "http://127.0.0.1:8000/questions"
+IMAGES_URL = "http://127.0.0.1:8000/images"
+headers = {
+    "Content-Type": "application/json"
+}
+IMAGE_TRANSPORT = os.environ.get("PDF2JSON_IMAGE_TRANSPORT", "json")
+OUTBOX_DIR = Path("scratch") / "outbox"
+MAX_ATTEMPTS = 5
+BACKOFF_SECONDS = 1.0  # doubled after every failed attempt
+TIMEOUT_SECONDS = 30
+
+
+def image_digests(question_data):
+    return sorted({entry['sha256'] for entry in question_data['data'] if 'sha256' in entry})
+
+
+def inline_images(question_data, read_image):
+    """The legacy body: every image entry gets its PNG (read_image(sha256) -> bytes) as a base64 "value"."""
+    data = []
+    for entry in question_data['data']:
+        if 'sha256' in entry:
+            entry = dict(entry)
+            entry['value'] = base64.b64encode(read_image(entry.pop('sha256'))).decode('utf-8')
+        data.append(entry)
+    return {'data': data, 'filter': question_data['filter']}
+
+
+def snapshot(question_data):
+    """Cheap copy of question_data that later edits in the UI can't change (values are shared strings)."""
+    return {
+        'data': [dict(entry) for entry in question_data['data']],
+        'filter': {k: list(v) if isinstance(v, list) else v for k, v in question_data['filter'].items()},
+    }
+
+
+class SubmissionQueue(QObject):
+    """Sends questions one by one from a background thread over a keep-alive requests.Session."""
+    queued = Signal(str, int)            # submission id, submissions pending
+    sent = Signal(str, object)           # submission id, decoded response
+    retrying = Signal(str, int, str)     # submission id, next attempt, last error
+    failed = Signal(str, str)            # submission id, error (kept in the outbox)
+
+    def __init__(self, url=url, outbox_dir=OUTBOX_DIR, transport=IMAGE_TRANSPORT, images_url=IMAGES_URL,
+                 parent=None):
+        super().__init__(parent)
+        if transport not in ("json", "multipart", "hash"):
+            raise ValueError(f"Unknown image transport: {transport}")
+        self.url = url
+        self.images_url = images_url
+        self.transport = transport
+        self.outbox_dir = Path(outbox_dir)
+        self.rejected_dir = self.outbox_dir / "rejected"
+        self.blobs_dir = self.outbox_dir / "blobs"
+        self.blobs_dir.mkdir(parents=True, exist_ok=True)
+        self._uploaded = set()  # digests the backend is known to have (hash transport)
+        self.session = requests.Session()
+        self.session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=1))
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=1))
+        self._queue = queue.Queue()
+        self._pending = set()
+        self._lock = threading.Lock()
+        # held while blobs are written or dropped, so a sent submission can't delete a blob a new one just reused
+        self._outbox_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="submission-queue", daemon=True)
+        self._thread.start()
+
+    def pending_count(self):
+        with self._lock:
+            return len(self._pending)
+
+    def submit(self, question_data, images=None):
+        """
+        Write a question (pass a snapshot(), the UI keeps editing its own copy) with the PNG bytes
+        of its images as {sha256: bytes} to the outbox and queue it. Raises OSError if the outbox
+        can't be written, nothing is queued then.
+        """
+        submission_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        path = self.outbox_dir / f"{submission_id}.json"
+        with self._outbox_lock:
+            for digest, png in (images or {}).items():
+                # content addressed, an image already waiting in the outbox is not written twice
+                if not self.blob_path(digest).exists():
+                    tmp_blob = self.blobs_dir / f"{digest}.tmp"
+                    tmp_blob.write_bytes(png)
+                    tmp_blob.replace(self.blob_path(digest))
+            tmp_path = path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(question_data, ensure_ascii=False), encoding="utf-8")
+            tmp_path.replace(path)
+        self._enqueue(submission_id)
+        return submission_id
+
+    def blob_path(self, digest):
+        return self.blobs_dir / f"{digest}.png"
+
+    def replay(self):
+        """Queue again everything left in the outbox by failed attempts or a previous session."""
+        replayed = 0
+        for path in sorted(self.outbox_dir.glob("*.json")):
+            with self._lock:
+                if path.stem in self._pending:
+                    continue
+            self._enqueue(path.stem)
+            replayed += 1
+        return replayed
+
+    def stop(self):
+        # unsent submissions stay in the outbox for the next session
+        self._queue.put(None)
+
+    def _enqueue(self, submission_id):
+        with self._lock:
+            self._pending.add(submission_id)
+            pending = len(self._pending)
+        self._queue.put(submission_id)
+        self.queued.emit(submission_id, pending)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            submission_id = item
+            try:
+                self._send(submission_id, self.outbox_dir / f"{submission_id}.json")
+            except Exception as e:
+                _log.error(f"Submission {submission_id} failed: {e}")
+                self.failed.emit(submission_id, str(e))
+            finally:
+                with self._lock:
+                    self._pending.discard(submission_id)
+
+    def _send(self, submission_id, path):
+        question_data = json.loads(path.read_text(encoding="utf-8"))
+        error = None
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            try:
+                response = self._post(question_data)
+                if response.ok:
+                    path.unlink(missing_ok=True)
+                    self._drop_blobs(image_digests(question_data))
+                    try:
+                        payload = response.json()
+                    except ValueError:
+                        payload = response.text
+                    self.sent.emit(submission_id, payload)
+                    return
+                if 400 <= response.status_code < 500 and response.status_code not in (408, 429):
+                    # the backend refused this payload, replaying it would fail the same way
+                    self.rejected_dir.mkdir(parents=True, exist_ok=True)
+                    path.replace(self.rejected_dir / path.name)
+                    self.failed.emit(submission_id, f"HTTP {response.status_code}: {response.text[:200]}")
+                    return
+                error = f"HTTP {response.status_code}"
+            except requests.RequestException as e:
+                error = str(e)
+            if attempt < MAX_ATTEMPTS:
+                self.retrying.emit(submission_id, attempt + 1, error)
+                time.sleep(BACKOFF_SECONDS * 2 ** (attempt - 1))
+        self.failed.emit(submission_id, error)
+
+    def _post(self, question_data):
+        digests = image_digests(question_data)
+        if self.transport == "multipart":
+            files = [("question", ("question.json", json.dumps(question_data, ensure_ascii=False).encode("utf-8"),
+                                   "application/json"))]
+            files += [(digest, (f"{digest}.png", self.blob_path(digest).read_bytes(), "image/png"))
+                      for digest in digests]
+            return self.session.post(self.url, files=files, timeout=TIMEOUT_SECONDS)
+        if self.transport == "hash":
+            for digest in digests:
+                failed = self._upload_image(digest)
+                if failed is not None:
+                    return failed  # retried or rejected like a failed question POST
+            body = question_data
+        else:
+            # legacy body: every image inlined as base64
+            body = inline_images(question_data, lambda digest: self.blob_path(digest).read_bytes())
+        return self.session.post(self.url, data=json.dumps(body, ensure_ascii=False).encode("utf-8"),
+                                 headers=headers, timeout=TIMEOUT_SECONDS)
+
+    def _upload_image(self, digest):
+        """Make sure the backend has this image, sending it only if it doesn't. Returns the failed PUT response, if any."""
+        if digest in self._uploaded:
+            return None
+        image_url = f"{self.images_url}/{digest}"
+        if self.session.head(image_url, timeout=TIMEOUT_SECONDS).status_code != 200:
+            response = self.session.put(image_url, data=self.blob_path(digest).read_bytes(),
+                                        headers={"Content-Type": "image/png"}, timeout=TIMEOUT_SECONDS)
+            if not response.ok:
+                return response
+        self._uploaded.add(digest)
+        return None
+
+    def _drop_blobs(self, digests):
+        """Delete the images of a sent submission unless another outbox entry still needs them."""
+        if not digests:
+            return
+        with self._outbox_lock:
+            still_needed = set()
+            for other in self.outbox_dir.glob("*.json"):
+                try:
+                    still_needed.update(image_digests(json.loads(other.read_text(encoding="utf-8"))))
+                except (OSError, ValueError):
+                    continue
+            for digest in digests:
+                if digest not in still_needed:
+                    self.blob_path(digest).unlink(missing_ok=True)
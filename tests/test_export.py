@@ -0,0 +1,85 @@
+import pytest
+
+pytest.importorskip("docling_core")
+
+from export import DocumentExporter, QuestionExporter, iter_jsonl  # noqa: E402
+
+
+def text_record(ref, page, text, bbox=(50.0, 60.0, 300.0, 72.0)):
+    return {'kind': 'text', 'ref': ref, 'label': 'text', 'page': page, 'bbox': list(bbox), 'text': text,
+            'empty_text': False}
+
+
+def exported(tmp_path, name="prova"):
+    return list(iter_jsonl(tmp_path / name / "elements.jsonl"))
+
+
+def test_keys_do_not_depend_on_the_batch_layout(tmp_path):
+    exporter = DocumentExporter(tmp_path, "prova", source="options-a")
+    # page 3 converted alone, its item is #/texts/0
+    assert exporter.export_records([text_record("#/texts/0", 3, "Questão 3")], 3) == 1
+    exporter.close()
+    # then as part of pages 1-4, where the same item is #/texts/4
+    exporter = DocumentExporter(tmp_path, "prova", source="options-a")
+    assert exporter.export_records([text_record("#/texts/0", 1, "Questão 1"),
+                                    text_record("#/texts/4", 3, "Questão 3")], 1) == 1
+    exporter.close()
+    assert [record['text'] for record in exported(tmp_path)] == ["Questão 3", "Questão 1"]
+
+
+def test_other_options_start_the_file_over(tmp_path):
+    exporter = DocumentExporter(tmp_path, "prova", source="options-a")
+    exporter.export_records([text_record("#/texts/0", 1, "sem OCR")], 1)
+    exporter.close()
+    exporter = DocumentExporter(tmp_path, "prova", source="options-b")
+    assert exporter.export_records([text_record("#/texts/0", 1, "com OCR")], 1) == 1
+    exporter.close()
+    assert [record['text'] for record in exported(tmp_path)] == ["com OCR"]
+
+
+def test_partial_last_line_is_dropped_on_resume(tmp_path):
+    exporter = DocumentExporter(tmp_path, "prova", source="options-a")
+    exporter.export_records([text_record("#/texts/0", 1, "um")], 1)
+    exporter.close()
+    with open(tmp_path / "prova" / "elements.jsonl", "a", encoding="utf-8") as fp:
+        fp.write('{"key": "p2:text')  # crash mid-line
+    exporter = DocumentExporter(tmp_path, "prova", source="options-a")
+    assert exporter.export_records([text_record("#/texts/0", 2, "dois")], 2) == 1
+    exporter.close()
+    assert [record['text'] for record in exported(tmp_path)] == ["um", "dois"]
+
+
+def test_questions_are_written_once_with_their_images(tmp_path):
+    question = {'data': [{'id': 0, 'type': 'question', 'value': 'Observe'},
+                         {'id': 1, 'type': 'image', 'sha256': 'ab' * 32}],
+                'filter': {'materia': [], 'assunto': [''], 'subAssunto': [''], 'faculdade': '', 'ano': ''}}
+    exporter = QuestionExporter(tmp_path)
+    assert exporter.export(question, {'ab' * 32: b"png"})
+    # ids (positions in the panel) don't make another question
+    assert not exporter.export(dict(question, data=[dict(entry, id=entry['id'] + 5) for entry in question['data']]),
+                               {'ab' * 32: b"png"})
+    exporter.close()
+    record, = iter_jsonl(tmp_path / "questions.jsonl")
+    assert (tmp_path / record['data'][1]['image']).read_bytes() == b"png"
+
+
+def test_thread_count_does_not_restart_the_export(tmp_path):
+    pytest.importorskip("docling")
+    from docling.datamodel.pipeline_options import AcceleratorOptions
+
+    from converter import default_pipeline_options, output_options_key
+
+    options = default_pipeline_options()
+    options.accelerator_options = AcceleratorOptions(num_threads=4)
+    exporter = DocumentExporter(tmp_path, "prova", source=output_options_key(options))
+    exporter.export_records([text_record("#/texts/0", 1, "um")], 1)
+    exporter.close()
+    # batch.py --workers changes num_threads between runs
+    options.accelerator_options = AcceleratorOptions(num_threads=8)
+    exporter = DocumentExporter(tmp_path, "prova", source=output_options_key(options))
+    assert exporter.export_records([text_record("#/texts/0", 1, "um")], 1) == 0
+    exporter.close()
+    options.do_ocr = not options.do_ocr
+    exporter = DocumentExporter(tmp_path, "prova", source=output_options_key(options))
+    assert exporter.export_records([text_record("#/texts/0", 1, "um")], 1) == 1
+    exporter.close()
@@ -0,0 +1,36 @@
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from profiler import Profiler
+
+
+def test_stage_summary_keeps_untraced_spans_out_of_the_trace():
+    profiler = Profiler(max_spans=2)
+    for _ in range(10):
+        with profiler.span("paint_text", trace=False):
+            pass
+    with profiler.span("convert", pages="1-2"):
+        pass
+    summary = profiler.stage_summary()
+    assert summary['paint_text']['count'] == 10
+    assert summary['convert']['count'] == 1
+    assert [span[0] for span in profiler.spans] == ["convert"]
+
+
+def test_docling_timings_are_utc(monkeypatch):
+    # docling's TimeRecorder stores naive datetime.utcnow() values
+    monkeypatch.setenv("TZ", "America/Sao_Paulo")
+    time.tzset()
+    try:
+        profiler = Profiler()
+        started = datetime.now(timezone.utc).replace(tzinfo=None)
+        timings = {'layout': SimpleNamespace(start_timestamps=[started], times=[0.5],
+                                             scope=SimpleNamespace(value="page"))}
+        profiler.add_docling_timings(timings)
+        (_name, start, seconds, *_rest), = profiler.spans
+        assert abs(start - time.perf_counter()) < 60
+        assert seconds == 0.5
+    finally:
+        monkeypatch.delenv("TZ")
+        time.tzset()
@@ -0,0 +1,138 @@
+import pytest
+
+from segmentation import alternative_letter, continues, numbered_line, question_header, segment, split_inline_alternatives
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("QUESTÃO 12", (12, "")),
+    ("QUESTAO 3 - Leia o texto", (3, "Leia o texto")),
+    ("Questão nº 7: Calcule", (7, "Calcule")),
+    ("QUESTION 2.", (2, "")),
+    ("questão 45) A figura", (45, "A figura")),
+    ("As questões 1 a 5 referem-se ao texto", None),
+    ("12. Texto", None),
+])
+def test_question_header(text, expected):
+    assert question_header(text) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("12. Calcule o pH", (12, "Calcule o pH")),
+    ("3) Outra questão", (3, "Outra questão")),
+    ("  4 - Leia", (4, "Leia")),
+    ("5 — Observe", (5, "Observe")),
+    ("3.5 mol foram usados", None),   # decimal
+    ("3,5 mol foram usados", None),
+    ("1-2 dias", None),               # range
+    ("2. 3 + 3 é igual a", (2, "3 + 3 é igual a")),
+    ("3)Outra", None),
+    ("1234. Ano", None),
+    ("Texto 3.", None),
+])
+def test_numbered_line(text, expected):
+    assert numbered_line(text) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("A) 4", "A"),
+    ("(b) 5", "B"),
+    ("c. seis", "C"),
+    ("E - nenhuma", "E"),
+    ("F) fora", None),
+    ("Ácido", None),
+])
+def test_alternative_letter(text, expected):
+    assert alternative_letter(text) == expected
+
+
+@pytest.mark.parametrize("text, first_letter, expected", [
+    ("A) 1 B) 2 C) 3", "A", ["A) 1", "B) 2", "C) 3"]),
+    ("(A) x (B) y", "A", ["(A) x", "(B) y"]),
+    ("C) 3 D) 4 E) 5", "C", ["C) 3", "D) 4", "E) 5"]),
+    ("A) 1 C) 3", "A", []),          # letters out of order
+    ("B) 2 C) 3", "A", []),          # not the expected letter
+    ("Veja A) e B)", "A", []),       # text before the first letter
+    ("A) só uma", "A", []),
+])
+def test_split_inline_alternatives(text, first_letter, expected):
+    assert split_inline_alternatives(text, first_letter) == expected
+
+
+def record(text, key, page=1, bbox=None, kind='text', label='text'):
+    return {'kind': kind, 'text': text, 'key': key, 'page': page, 'bbox': bbox, 'label': label}
+
+
+@pytest.mark.parametrize("next_bbox, page, expected", [
+    ([200, 100, 260, 112], 1, True),    # same line, to the right
+    ([105, 114, 300, 126], 1, True),    # next line, same column
+    ([85, 114, 300, 126], 1, True),     # slightly further left, within the tolerance
+    ([40, 114, 300, 126], 1, False),    # starts well left of the alternative
+    ([105, 160, 300, 172], 1, False),   # too far below
+    ([105, 90, 300, 98], 1, False),     # above it
+    ([105, 114, 300, 126], 2, False),   # another page
+    (None, 1, False),
+])
+def test_continues(next_bbox, page, expected):
+    previous = record("A) 4", "a", bbox=[100, 100, 180, 112])
+    assert continues(previous, record("mol", "b", page=page, bbox=next_bbox)) is expected
+
+
+def entries(question):
+    return [(entry['type'], entry['text']) for entry in question['entries'] if entry['kind'] == 'text']
+
+
+def test_decimal_inside_a_question_is_not_a_new_question():
+    questions = segment([
+        record("2) Quanto gás foi usado?", "1"),
+        record("3.5 mol foram usados", "2"),
+        record("A) 1", "3"),
+        record("3) Outra questão", "4"),
+    ])
+    assert [question['number'] for question in questions] == [2, 3]
+    assert entries(questions[0]) == [('question', "Quanto gás foi usado?"), ('question', "3.5 mol foram usados"),
+                                     ('point', "A) 1")]
+    assert entries(questions[1]) == [('question', "Outra questão")]
+
+
+def test_statement_starting_with_a_number_is_a_question():
+    questions = segment([
+        record("1. Quanto é 2 + 2?", "1"),
+        record("A) 4", "2"),
+        record("2. 20% de 50 é", "3"),
+        record("A) 10", "4"),
+        record("3. Quem descobriu o oxigênio?", "5"),
+        record("A) Lavoisier", "6"),
+    ])
+    assert [question['number'] for question in questions] == [1, 2, 3]
+    assert entries(questions[1]) == [('question', "20% de 50 é"), ('point', "A) 10")]
+
+
+def test_headers_win_over_numbered_lines():
+    questions = segment([
+        record("QUESTÃO 1", "1"),
+        record("2. Considere os itens", "2"),
+        record("A) 1 B) 2", "3"),
+        record("QUESTÃO 2", "4"),
+        record("Enunciado", "5"),
+    ])
+    assert [question['number'] for question in questions] == [1, 2]
+    assert entries(questions[0]) == [('question', "2. Considere os itens"), ('point', "A) 1"), ('point', "B) 2")]
+
+
+def test_wrapped_alternative_images_and_skipped_records():
+    questions = segment([
+        record("Prova de Química", "0", label='page_header'),
+        record("1. Observe a figura", "1", bbox=[50, 50, 300, 62]),
+        record(None, "2", kind='picture', bbox=[50, 70, 300, 200]),
+        record("A) uma resposta", "3", bbox=[50, 210, 300, 222]),
+        record("que continua", "4", bbox=[60, 224, 200, 236]),
+        record("", "5", bbox=[50, 240, 100, 250]),
+        record("B) outra", "6", bbox=[50, 252, 300, 264]),
+        record("", "7", bbox=[50, 270, 100, 280], label='formula') | {'has_crop': True},
+        record(None, "7#crop", kind='formula', bbox=[50, 270, 100, 280]),
+    ])
+    question, = questions
+    assert [entry['type'] for entry in question['entries']] == ['question', 'image', 'point', 'point', 'image']
+    assert question['entries'][2] == {'kind': 'text', 'type': 'point', 'text': "A) uma resposta que continua",
+                                      'keys': ["3", "4"]}
+    assert question['entries'][4]['key'] == "7#crop"
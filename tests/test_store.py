@@ -0,0 +1,104 @@
+import pytest
+
+from store import QuestionStore
+
+QUESTION = {'data': [{'id': 0, 'type': 'question', 'value': 'Quanto é 2 + 2?'},
+                     {'id': 1, 'type': 'point', 'value': 'A) 4'}],
+            'filter': {'materia': ['Matematica'], 'assunto': [''], 'subAssunto': [''], 'faculdade': '', 'ano': ''}}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = QuestionStore(tmp_path / "questions.db")
+    yield store
+    store.close()
+
+
+def status(store, question_id):
+    return store.db.execute("SELECT status FROM questions WHERE id = ?", (question_id,)).fetchone()['status']
+
+
+def confirmed(store):
+    question_id = store.save(None, QUESTION)
+    assert store.confirm(question_id)
+    return question_id
+
+
+def edited(question_data):
+    return {'data': question_data['data'] + [{'id': 2, 'type': 'point', 'value': 'B) 5'}],
+            'filter': question_data['filter']}
+
+
+def test_confirmed_question_is_synced_once(store):
+    question_id = confirmed(store)
+    assert store.unsynced() == [question_id]
+    store.mark_sending(question_id, "s1")
+    assert store.unsynced() == []
+    assert store.mark_sent("s1") == question_id
+    assert status(store, question_id) == 'synced'
+    # confirming it again unchanged doesn't send it again
+    assert not store.confirm(question_id)
+    assert store.unsynced() == []
+
+
+def test_edit_while_sending_is_synced_again(store):
+    question_id = confirmed(store)
+    store.mark_sending(question_id, "s1")
+    store.save(question_id, edited(QUESTION))
+    assert status(store, question_id) == 'draft'
+    store.mark_sent("s1")
+    # the backend has the old version, the draft stays a draft
+    assert status(store, question_id) == 'draft'
+    assert store.confirm(question_id)
+    assert store.unsynced() == [question_id]
+
+
+def test_saving_unchanged_keeps_the_status(store):
+    question_id = confirmed(store)
+    store.save(question_id, QUESTION)
+    assert status(store, question_id) == 'ready'
+
+
+def test_rejected(store):
+    question_id = confirmed(store)
+    store.mark_sending(question_id, "s1")
+    store.mark_rejected("s1")
+    assert status(store, question_id) == 'rejected'
+    assert store.unsynced() == []
+
+
+@pytest.mark.parametrize("left_in, expected", [
+    ("outbox", 'sending'),     # replayed by SubmissionQueue.replay
+    ("rejected", 'rejected'),
+    (None, 'synced'),          # sent while the app was closing
+])
+def test_reconcile(store, tmp_path, left_in, expected):
+    outbox_dir, rejected_dir = tmp_path / "outbox", tmp_path / "outbox" / "rejected"
+    rejected_dir.mkdir(parents=True)
+    question_id = confirmed(store)
+    store.mark_sending(question_id, "s1")
+    if left_in is not None:
+        (outbox_dir / left_in if left_in == "rejected" else outbox_dir).joinpath("s1.json").write_text("{}")
+    store.reconcile(outbox_dir, rejected_dir)
+    assert status(store, question_id) == expected
+
+
+def test_queued_but_unsent_question_survives_a_restart(store, tmp_path):
+    # the app closed while the question still waited in the submission queue
+    pytest.importorskip("PySide6")
+    from submission import SubmissionQueue
+
+    def stopped_queue():
+        submissions = SubmissionQueue(url="http://127.0.0.1:9/questions", outbox_dir=tmp_path / "outbox")
+        submissions.stop()
+        submissions._thread.join()
+        return submissions
+
+    submissions = stopped_queue()
+    question_id = confirmed(store)
+    question_data, images = store.load(question_id)
+    store.mark_sending(question_id, submissions.submit(question_data, images))
+
+    store.reconcile(submissions.outbox_dir, submissions.rejected_dir)
+    assert status(store, question_id) == 'sending'
+    assert stopped_queue().replay() == 1
@@ -0,0 +1,165 @@
+import base64
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("PySide6")
+
+from PySide6.QtCore import QCoreApplication  # noqa: E402
+
+from submission import SubmissionQueue  # noqa: E402
+
+# signals from the sending thread are delivered through the event loop
+app = QCoreApplication.instance() or QCoreApplication([])
+
+QUESTION = {'data': [{'id': 0, 'type': 'question', 'value': 'Quanto é 2 + 2?'},
+                     {'id': 1, 'type': 'image', 'sha256': 'ab' * 32}],
+            'filter': {'materia': ['Matematica'], 'assunto': [''], 'subAssunto': [''], 'faculdade': '', 'ano': ''}}
+
+
+def stopped_queue(tmp_path, **kwargs):
+    """A queue whose sending thread is already gone, as if the app closed right after submit()."""
+    submissions = SubmissionQueue(url="http://127.0.0.1:9/questions", outbox_dir=tmp_path / "outbox", **kwargs)
+    submissions.stop()
+    submissions._thread.join()
+    return submissions
+
+
+def test_submit_writes_the_outbox_before_anything_is_sent(tmp_path):
+    submissions = stopped_queue(tmp_path)
+    submission_id = submissions.submit(QUESTION, {'ab' * 32: b"png bytes"})
+    path = submissions.outbox_dir / f"{submission_id}.json"
+    assert json.loads(path.read_text(encoding="utf-8")) == QUESTION
+    assert submissions.blob_path('ab' * 32).read_bytes() == b"png bytes"
+    assert submissions.pending_count() == 1
+
+
+def test_replay_queues_what_a_previous_session_left(tmp_path):
+    first_id = stopped_queue(tmp_path).submit(QUESTION, {'ab' * 32: b"png bytes"})
+    submissions = stopped_queue(tmp_path)
+    assert submissions.replay() == 1
+    assert submissions._queue.get_nowait() == first_id
+
+
+class StubBackend:
+    """The /questions and /images endpoints on a local port, recording every request."""
+
+    def __init__(self, put_status=201):
+        self.put_status = put_status
+        self.requests = []
+        self.images = {}
+        backend = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def body(self):
+                return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+            def reply(self, status, payload=b""):
+                self.send_response(status)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(payload)
+
+            def do_HEAD(self):
+                backend.requests.append(("HEAD", self.path, b""))
+                self.reply(200 if self.path.rsplit("/", 1)[-1] in backend.images else 404)
+
+            def do_PUT(self):
+                body = self.body()
+                backend.requests.append(("PUT", self.path, body))
+                if backend.put_status < 300:
+                    backend.images[self.path.rsplit("/", 1)[-1]] = body
+                self.reply(backend.put_status)
+
+            def do_POST(self):
+                backend.requests.append(("POST", self.path, self.body(), self.headers.get("Content-Type")))
+                self.reply(200, b'{"id": 1}')
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def backend():
+    stub = StubBackend()
+    yield stub
+    stub.close()
+
+
+def send(tmp_path, backend, transport, question=QUESTION, images=None):
+    """Submit one question through a running queue, returns (signal name, submission id, payload) events."""
+    submissions = SubmissionQueue(url=f"{backend.url}/questions", outbox_dir=tmp_path / "outbox",
+                                  transport=transport, images_url=f"{backend.url}/images")
+    events = []
+    submissions.retrying.connect(lambda *args: events.append(("retrying", *args)))
+    submissions.sent.connect(lambda *args: events.append(("sent", *args)))
+    submissions.failed.connect(lambda *args: events.append(("failed", *args)))
+    submissions.submit(question, images if images is not None else {'ab' * 32: PNG})
+    deadline = time.monotonic() + 10
+    while not any(event[0] in ("sent", "failed") for event in events):
+        assert time.monotonic() < deadline, events
+        app.processEvents()
+        time.sleep(0.01)
+    submissions.stop()
+    return submissions, events
+
+
+PNG = b"\x89PNG\r\n\x1a\n fake image"
+
+
+def test_json_transport_inlines_base64(tmp_path, backend):
+    submissions, events = send(tmp_path, backend, "json")
+    assert [event[0] for event in events] == ["sent"]
+    (_method, path, body, _content_type), = backend.requests
+    sent = json.loads(body)
+    assert path == "/questions"
+    assert sent['data'][1] == {'id': 1, 'type': 'image', 'value': base64.b64encode(PNG).decode()}
+    assert not list(submissions.outbox_dir.glob("*.json"))
+    assert not submissions.blob_path('ab' * 32).exists()
+
+
+def test_multipart_transport_sends_the_png_as_a_part(tmp_path, backend):
+    _submissions, events = send(tmp_path, backend, "multipart")
+    assert [event[0] for event in events] == ["sent"]
+    (_method, _path, body, content_type), = backend.requests
+    assert content_type.startswith("multipart/form-data")
+    assert PNG in body
+    assert json.dumps(QUESTION, ensure_ascii=False).encode("utf-8") in body
+
+
+def test_hash_transport_uploads_an_image_once(tmp_path, backend):
+    send(tmp_path, backend, "hash")
+    assert [request[0] for request in backend.requests] == ["HEAD", "PUT", "POST"]
+    assert backend.images == {'ab' * 32: PNG}
+    assert json.loads(backend.requests[-1][2]) == QUESTION
+
+    backend.requests.clear()
+    send(tmp_path, backend, "hash")
+    # the backend already has it
+    assert [request[0] for request in backend.requests] == ["HEAD", "POST"]
+
+
+def test_hash_transport_rejects_a_refused_upload(tmp_path):
+    stub = StubBackend(put_status=413)
+    try:
+        submissions, events = send(tmp_path, stub, "hash")
+    finally:
+        stub.close()
+    assert [event[0] for event in events] == ["failed"]
+    assert "HTTP 413" in events[0][2]
+    assert [request[0] for request in stub.requests] == ["HEAD", "PUT"]
+    assert len(list(submissions.rejected_dir.glob("*.json"))) == 1
+    assert not list(submissions.outbox_dir.glob("*.json"))
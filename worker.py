@@ -0,0 +1,224 @@
+import logging
+import time
+from pathlib import Path
+
+from PySide6.QtCore import QObject, Signal, Slot
+
+from conversion_cache import file_hash
+from export import DocumentExporter
+from converter import count_pages, output_options_key, page_batches, resolve_profile
+from extraction import extract_element
+from image_store import THUMBNAIL_WIDTH, make_thumbnail
+from profiler import PROFILER
+
+_log = logging.getLogger(__name__)
+
+CHUNK_SIZE = 20  # max records per chunk_ready emission
+PAGE_BATCH_SIZE = 2  # pages sent to docling per convert() call
+
+
+class ConversionWorker(QObject):
+    """
+    Runs the docling conversion and element extraction outside the GUI thread.
+    Move it to a QThread and connect QThread.started to run().
+    """
+    progress = Signal(int, int)        # pages done, total pages
+    chunk_ready = Signal(list)         # list of element records, in document order
+    first_elements = Signal(float)     # seconds until the first chunk was ready (time-to-first-element)
+    profile_chosen = Signal(str)       # pipeline profile used for this document
+    element_failed = Signal(str)       # error message for a single element
+    failed = Signal(str)               # the whole conversion failed
+    cancelled = Signal()
+    finished = Signal(float)           # seconds taken
+
+    def __init__(self, converters, pipeline_options, file_path, image_spill, cache=None, profile="auto",
+                 pages=None, chunk_size=CHUNK_SIZE, page_batch_size=PAGE_BATCH_SIZE, formula_cropper=None,
+                 export_dir=None, preview_width=None):
+        super().__init__()
+        self.converters = converters
+        self.base_options = pipeline_options
+        self.profile = profile  # one of converter.PIPELINE_PROFILES
+        self.pages = pages  # sorted 1-based pages to convert, None for all
+        self.file_path = file_path
+        self.image_spill = image_spill  # image_store.ImageSpill receiving the element images
+        self.cache = cache  # optional conversion_cache.ConversionCache
+        self.formula_cropper = formula_cropper  # optional formula_crops.FormulaCropper
+        self.export_dir = export_dir  # elements are streamed to export_dir/<name>-<hash>/elements.jsonl when set
+        self.preview_width = preview_width  # width of the right panel's previews, a preview tier is made for wider images
+        self.chunk_size = chunk_size
+        self.page_batch_size = page_batch_size  # 0 converts the whole document in one go
+        self._cancelled = False
+        self._first_chunk_sent = False
+
+    def cancel(self):
+        # plain flag read by run(); safe to set from the GUI thread
+        self._cancelled = True
+
+    @Slot()
+    def run(self):
+        self.start_time = time.time()
+        exporter = None
+        try:
+            doc_converter = None
+            PROFILER.snapshot("conversion start")
+            with PROFILER.span("count_pages"):
+                total_pages = count_pages(self.file_path)
+            with PROFILER.span("resolve_profile", profile=self.profile):
+                profile, self.pipeline_options = resolve_profile(self.file_path, self.profile, self.base_options,
+                                                                 self.pages)
+            self.profile_chosen.emit(profile)
+            file_digest = None
+            if self.cache is not None or self.formula_cropper is not None or self.export_dir is not None:
+                with PROFILER.span("file_hash"):
+                    file_digest = file_hash(self.file_path)
+            if self.export_dir is not None:
+                exporter = DocumentExporter(self.export_dir, f"{Path(self.file_path).stem}-{file_digest[:12]}",
+                                            source=output_options_key(self.pipeline_options))
+            selected_pages = total_pages if self.pages is None else len(self.pages)
+            done_pages = 0
+            self.progress.emit(0, selected_pages)
+
+            # convert a few (selected) pages at a time, so the first pages show up no matter how long the document is
+            for first_page, last_page in page_batches(total_pages, self.page_batch_size, self.pages):
+                if self._cancelled:
+                    self.cancelled.emit()
+                    return
+                pages = f"{first_page}-{last_page}"
+                records = None
+                if self.cache is not None:
+                    cache_key = self.cache.key(file_digest, self.pipeline_options, first_page, last_page)
+                    with PROFILER.span("cache_load", pages=pages):
+                        records = self.cache.load(cache_key)
+                    PROFILER.count("cache.hit" if records is not None else "cache.miss")
+                if records is None:
+                    if doc_converter is None:
+                        # only wait for the models when something actually has to be converted
+                        with PROFILER.span("converter_get", profile=profile):
+                            doc_converter = self.converters.get(self.pipeline_options)
+                    with PROFILER.span("convert", pages=pages):
+                        conv_res = doc_converter.convert(self.file_path, page_range=(first_page, last_page))
+                    # docling's own stage timings: page parse, layout, OCR, table structure...
+                    PROFILER.add_docling_timings(conv_res.timings)
+                    with PROFILER.span("extract_records", pages=pages):
+                        records = self.extract_records(conv_res.document)
+                    if records is None:
+                        self.cancelled.emit()
+                        return
+                    if self.cache is not None:
+                        with PROFILER.span("cache_store", pages=pages):
+                            self.cache.store(cache_key, conv_res.document, records)
+                if self.formula_cropper is not None:
+                    records = self.add_formula_crops(records, file_digest)
+                with PROFILER.span("emit_records", pages=pages):
+                    emitted = self.emit_records(records, first_page)
+                if not emitted:
+                    self.cancelled.emit()
+                    return
+                if exporter is not None:
+                    # after the UI got the batch; elements exported by an earlier run are skipped
+                    with PROFILER.span("export", pages=pages):
+                        exporter.export_records(records, first_page)
+                done_pages += last_page - first_page + 1
+                PROFILER.count("pages", last_page - first_page + 1)
+                PROFILER.snapshot(f"pages {pages}")
+                self.progress.emit(done_pages, selected_pages)
+
+            self.finished.emit(time.time() - self.start_time)
+        except Exception as e:
+            _log.error(f"Conversion failed: {e}")
+            self.failed.emit(str(e))
+        finally:
+            if exporter is not None:
+                exporter.close()
+
+    def extract_records(self, document):
+        """Records (with PIL images) of one converted batch. Returns None when cancelled."""
+        records = []
+        for element, _level in document.iterate_items():
+            if self._cancelled:
+                return None
+            try:
+                with PROFILER.span("extract_element", element=type(element).__name__):
+                    record = extract_element(element, document)
+            except Exception as e:
+                self.element_failed.emit(f"Error processing element {type(element).__name__}: {str(e)}")
+                continue
+            if record is not None:
+                PROFILER.count(f"elements.{record['kind']}")
+                records.append(record)
+        return records
+
+    def add_formula_crops(self, records, file_digest):
+        """Follow every empty-text (formula) record with a 'formula' image record cropped from its page."""
+        formulas = [record for record in records if record['kind'] == 'text' and record['empty_text']
+                     and record.get('bbox') and record.get('page')]
+        if not formulas:
+            return records
+        with PROFILER.span("formula_crops", formulas=len(formulas)):
+            try:
+                crops = self.formula_cropper.crops(self.file_path, file_digest,
+                                                   [(record['page'], record['bbox']) for record in formulas])
+            except Exception as e:
+                self.element_failed.emit(f"Error cropping formulas: {str(e)}")
+                return records
+        crops = {record['ref']: crop for record, crop in zip(formulas, crops) if crop is not None}
+        PROFILER.count("elements.formula", len(crops))
+        with_crops = []
+        for record in records:
+            crop = crops.get(record['ref']) if record['kind'] == 'text' else None
+            if crop is None:
+                with_crops.append(record)
+                continue
+            with_crops.append(dict(record, has_crop=True))
+            with_crops.append({'ref': f"{record['ref']}#crop", 'label': 'formula', 'page': record['page'],
+                               'bbox': record['bbox'], 'kind': 'formula', 'image': crop})
+        return with_crops
+
+    def emit_records(self, records, first_page):
+        """Emit the records of one batch in per-page chunks. Returns False when cancelled."""
+        chunk = []
+        current_page = None
+        for record in records:
+            if self._cancelled:
+                return False
+            record = self.build_record(record, first_page)
+            # flush on page boundaries so page 1 reaches the UI before page 2 is prepared
+            if chunk and (record['page'] != current_page or len(chunk) >= self.chunk_size):
+                self.emit_chunk(chunk)
+                chunk = []
+            current_page = record['page']
+            chunk.append(record)
+        if chunk:
+            self.emit_chunk(chunk)
+        return True
+
+    def emit_chunk(self, chunk):
+        if not self._first_chunk_sent:
+            self._first_chunk_sent = True
+            self.first_elements.emit(time.time() - self.start_time)
+        self.chunk_ready.emit(chunk)
+
+    def build_record(self, record, first_page):
+        """Copy of a record ready for the UI."""
+        record = dict(record)
+        # self_ref is only unique inside one batch's document, prefix it with the batch
+        record['key'] = f"{first_page}:{record['ref']}"
+        if 'image' in record:
+            # records only carry where the thumbnail, the preview and the full image were spilled,
+            # all loaded on demand
+            image = record.pop('image')
+            preview = None
+            if self.preview_width and image.width > self.preview_width > THUMBNAIL_WIDTH:
+                # the right panel shows it at this width, scaled here instead of on the GUI thread at click time
+                with PROFILER.span("make_preview"):
+                    preview = make_thumbnail(image, self.preview_width)
+            with PROFILER.span("make_thumbnail"):
+                thumbnail = make_thumbnail(preview or image)
+            with PROFILER.span("spill_image"):
+                record['thumbnail'] = self.image_spill.put(thumbnail)
+                if preview is not None:
+                    record['preview'] = self.image_spill.put(preview)
+                record['image_file'] = self.image_spill.put(image)
+            PROFILER.count("bytes.thumbnail", record['thumbnail']['bytes'])
+            PROFILER.count("bytes.spill", record['image_file']['bytes'] + record.get('preview', {}).get('bytes', 0))
+        return record